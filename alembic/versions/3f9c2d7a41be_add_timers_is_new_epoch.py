@@ -0,0 +1,30 @@
+"""add timers is_new_epoch
+
+Revision ID: 3f9c2d7a41be
+Revises: 811e0a1ab467
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3f9c2d7a41be'
+down_revision: Union[str, None] = '811e0a1ab467'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'timers',
+        sa.Column('is_new_epoch', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('timers', 'is_new_epoch')
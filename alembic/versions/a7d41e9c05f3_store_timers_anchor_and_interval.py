@@ -0,0 +1,54 @@
+"""store timers anchor and interval
+
+Revision ID: a7d41e9c05f3
+Revises: 3f9c2d7a41be
+Create Date: 2026-10-18 11:40:07.918254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a7d41e9c05f3'
+down_revision: Union[str, None] = '3f9c2d7a41be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('timers', sa.Column('anchor_time', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('timers', sa.Column('interval_seconds', sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE timers AS t
+        SET interval_seconds = 3600 * CASE
+            WHEN t.is_new_epoch THEN b.epoch_time_to_respawn
+            ELSE b.time_to_respawn
+        END
+        FROM boss_respawns AS b
+        WHERE b.boss_name = t.boss_name
+        """
+    )
+    # Rows parked at respawn + 7 days during the grace minute
+    op.execute(
+        """
+        UPDATE timers
+        SET respawn_time = respawn_time - interval '7 days'
+        WHERE NOT is_new_epoch
+          AND respawn_time > now() + make_interval(secs => interval_seconds + 60)
+        """
+    )
+    op.execute("UPDATE timers SET anchor_time = respawn_time")
+
+    op.alter_column('timers', 'anchor_time', nullable=False)
+    op.alter_column('timers', 'interval_seconds', nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('timers', 'interval_seconds')
+    op.drop_column('timers', 'anchor_time')
@@ -0,0 +1,48 @@
+"""add timers composite indexes
+
+Revision ID: c52e8b1f9d60
+Revises: a7d41e9c05f3
+Create Date: 2026-10-18 13:05:44.631590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c52e8b1f9d60'
+down_revision: Union[str, None] = 'a7d41e9c05f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest timer of every (chat_id, boss_name) pair
+    op.execute(
+        """
+        DELETE FROM timers AS t
+        USING timers AS newer
+        WHERE t.chat_id = newer.chat_id
+          AND t.boss_name = newer.boss_name
+          AND (t.anchor_time, t.timer_id) < (newer.anchor_time, newer.timer_id)
+        """
+    )
+
+    op.drop_index('ix_timers_chat_id', table_name='timers')
+    op.create_index(
+        'ix_timers_chat_id_respawn_time', 'timers', ['chat_id', 'respawn_time'], unique=False
+    )
+    op.create_index('ix_timers_respawn_time', 'timers', ['respawn_time'], unique=False)
+    op.create_unique_constraint(
+        'uq_timers_chat_id_boss_name', 'timers', ['chat_id', 'boss_name']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_timers_chat_id_boss_name', 'timers', type_='unique')
+    op.drop_index('ix_timers_respawn_time', table_name='timers')
+    op.drop_index('ix_timers_chat_id_respawn_time', table_name='timers')
+    op.create_index('ix_timers_chat_id', 'timers', ['chat_id'], unique=False)
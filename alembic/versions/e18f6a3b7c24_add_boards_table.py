@@ -0,0 +1,32 @@
+"""add boards table
+
+Revision ID: e18f6a3b7c24
+Revises: c52e8b1f9d60
+Create Date: 2026-10-18 14:21:56.274803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e18f6a3b7c24'
+down_revision: Union[str, None] = 'c52e8b1f9d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'boards',
+        sa.Column('chat_id', sa.String(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('chat_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('boards')
@@ -1,21 +1,54 @@
 import asyncio
-from datetime import datetime, timedelta
+from datetime import timedelta
 from itertools import groupby, tee
 
 
-import pytz
-from tzlocal import get_localzone
-
-
-from database.db_logic import DataBaseAPI
+from config import (
+    DATABASE_URL,
+    SCHEDULER_BACKEND, 
+    SCHEDULER_WHEEL_RESOLUTION, 
+    MISSED_NOTIFICATIONS_POLICY,
+    TIMERS_SWEEP_INTERVAL,
+    TIMERS_SWEEP_BATCH_SIZE,
+    USERS_IMPORT_BATCH_SIZE,
+    OUTBOUND_GLOBAL_PER_SECOND,
+    OUTBOUND_CHAT_PER_MINUTE,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_WORKERS,
+    NOTIFY_COALESCE_WINDOW,
+    BOARD_UPDATE_INTERVAL,
+    RENDER_CACHE_MAX_ENTRIES,
+    METRICS_HOST,
+    METRICS_PORT,
+)
+from database.storage import create_storage
+from delivery.board import BoardUpdater
+from delivery.coalescer import NotificationCoalescer
+from delivery.outbound_queue import OutboundQueue, OutboundMessage, Priority
+from delivery.render_cache import RenderCache
 from intervals import respawn_intervals
-
-from utils.time_helper import user_to_system_tz, system_to_user_tz, seconds_to_hh_mm
+from metrics.registry import SCHEDULED_TIMERS, DB_POOL, OUTBOUND_DEPTH
+from metrics.server import MetricsServer
+from scheduler.base import Stage, TimerEntry
+from scheduler.heap_scheduler import HeapScheduler
+from scheduler.timing_wheel import TimingWheelScheduler
+
+from utils.epoch_time import (
+    DAY,
+    now_epoch,
+    to_epoch,
+    from_epoch,
+    parse_hh_mm,
+    wall_to_epoch,
+    wall_hh_mm,
+    remaining_hh_mm,
+    next_respawn_epoch,
+)
 from utils.logger import backend_logger
+from utils.texts import BOSSES_TEXT, NO_TIMERS_TEXT
 
-db = DataBaseAPI()
-moscow_tz = pytz.timezone("Europe/Moscow")
-system_tz = pytz.timezone(str(get_localzone()))
+db = create_storage(DATABASE_URL)
+render_cache = RenderCache(max_entries=RENDER_CACHE_MAX_ENTRIES)
 
 
 async def init_db():
@@ -23,19 +56,15 @@ async def init_db():
     res2 =  await db.initialize_boss_respawns()
     if not res1 or not res2:
         backend_logger.error(f"Error: cannot init db")
+        return
 
+    await restore_timers()
+    await restore_boards()
 
-async def calculate_respawn_datetime(kill_datetime, now, boss_name, is_new_epoch: bool = False):
-    if kill_datetime > now: # It was yesterday
-        kill_datetime -= timedelta(days=1)
 
-    if is_new_epoch:
-        interval_raw = respawn_intervals[boss_name][1]
-    else:
-        interval_raw = respawn_intervals[boss_name][0]
-    interval = timedelta(hours=interval_raw)                                         
-    respawn_datetime = kill_datetime + interval
-    return respawn_datetime, interval
+def respawn_interval_seconds(boss_name: str, is_new_epoch: bool = False) -> int:
+    interval_raw = respawn_intervals[boss_name][1 if is_new_epoch else 0]
+    return interval_raw * 3600
 
 
 async def set_timer(
@@ -55,13 +84,12 @@ async def set_timer(
         )
         return
 
+    now = now_epoch()
     if kill_time_str is None:
-        now = moscow_tz.localize(datetime.now())
-        kill_datetime = now
+        kill_time = now
     else:
-        try:
-            kill_time = datetime.strptime(kill_time_str, "%H:%M").time()
-        except ValueError:
+        kill_minute = parse_hh_mm(kill_time_str)
+        if kill_minute is None:
             await event.reply("❌ Неверный формат времени. Используй ЧЧ:ММ.")
             backend_logger.error(
                 f"In chat {chat_id} User {user_id} used wrong command "
@@ -69,18 +97,15 @@ async def set_timer(
                 f"Error: wrong time format"
             )
             return
-        else:
-            now = system_tz.localize(datetime.now())
-            kill_datetime = user_to_system_tz(datetime.combine(now.date(), kill_time))
-
-    respawn_datetime, interval = await calculate_respawn_datetime(
-        kill_datetime, 
-        now,  
-        boss_name,
-        is_new_epoch,
-    )
 
-    if respawn_datetime < now:
+        kill_time = wall_to_epoch(kill_minute, now)
+        if kill_time > now: # It was yesterday
+            kill_time -= DAY
+
+    interval_seconds = respawn_interval_seconds(boss_name, is_new_epoch)
+    respawn_time = kill_time + interval_seconds
+
+    if respawn_time < now:
         await event.reply(
             f"❌ Босс **{boss_name}** уже возродился, скорее беги его убивать!"
         )
@@ -89,136 +114,280 @@ async def set_timer(
         )
         return
     
-    timer = await db.add_timer(
+    res = await db.add_timer(
         user_id=user_id,
         chat_id=chat_id, 
         boss_name=boss_name, 
-        respawn_time=respawn_datetime
+        respawn_time=from_epoch(respawn_time),
+        interval_seconds=interval_seconds,
+        is_new_epoch=is_new_epoch,
     )
-    if not timer:
+    if not res:
         await event.reply("❌ Проблема с доступом в базу данных")
         backend_logger.error(
             "Trouble with db when adding timer into 'add_timer' function"
         )
         return
+    timer, replaced_timer_id = res
     backend_logger.success(
         f"In chat {chat_id} User {user_id} created timer {timer.timer_id}"
     )
+    if replaced_timer_id:
+        scheduler.cancel(replaced_timer_id)
+
+    remaining_formatted_time = remaining_hh_mm(respawn_time - now)
+
+    if not is_new_epoch:
+        notify_chat(
+            chat_id,
+            f"✅ Установлен таймер :\n{wall_hh_mm(respawn_time)} — "
+            f"**{timer.boss_name}** ({remaining_formatted_time}) — `{timer.timer_id}`\n",
+            Priority.CONFIRMATION,
+            event.message.id,
+        )
 
-    remaining_time = respawn_datetime - now
-    wait_seconds = remaining_time.total_seconds()
-    time_to_notification = wait_seconds - 180
-    remaining_formatted_time = seconds_to_hh_mm(wait_seconds)
-    
-    if is_new_epoch:
-        await asyncio.sleep(time_to_notification)
-        if not await db._get_timer(timer):
-            backend_logger.info(f"Timer {timer.timer_id} was already deleted")
-            return
+    scheduler.schedule(TimerEntry(
+        timer_id=timer.timer_id,
+        chat_id=chat_id,
+        boss_name=boss_name,
+        user_id=user_id,
+        respawn_time=timer.respawn_time,
+        interval=timedelta(seconds=interval_seconds),
+        is_new_epoch=is_new_epoch,
+        reply_to=event.message.id,
+    ))
 
-        await event.reply(f"‼️ Босс **{boss_name}** возродится через 3 минуты, будьте готовы!")
-        backend_logger.success(
-            f"In chat {chat_id} User {user_id} response "
-            f"notification from timer {timer.timer_id}"
-        )
 
-        await asyncio.sleep(180)
-        if not await db._get_timer(timer):
-            backend_logger.info(f"Timer {timer.timer_id} was already deleted")
-            return
-        
-        await event.reply(f"✅ Босс **{boss_name}** возродился, скорее бегите его убивать!")
+async def send_message(chat_id: str, text: str, reply_to: int | None = None):
+    await _client.send_message(int(chat_id), text, reply_to=reply_to)
+
+
+def notify_chat(chat_id: str, text: str, priority: Priority, reply_to: int | None = None):
+    outbound.put(OutboundMessage(
+        chat_id=chat_id, 
+        text=text, 
+        priority=priority, 
+        reply_to=reply_to,
+    ))
+
+
+async def handle_timer_stage(entry: TimerEntry) -> bool:
+    chat_id = entry.chat_id
+    user_id = entry.user_id
+    timer_id = entry.timer_id
+    boss_name = entry.boss_name
+
+    if entry.stage is Stage.WARNING:
+        coalescer.add(
+            chat_id,
+            Priority.WARNING,
+            f"‼️ Босс **{boss_name}** возродится через 3 минуты, будьте готовы!",
+            "‼️ Через 3 минуты возродятся боссы, будьте готовы:",
+            f"**{boss_name}**",
+            entry.reply_to,
+            entry.fire_at,
+        )
         backend_logger.success(
             f"In chat {chat_id} User {user_id} response "
-            f"notification from timer {timer.timer_id}"
+            f"notification from timer {timer_id}"
         )
+        return True
 
-        timer_id = timer.timer_id
-        res = await db.delete_timer(
-            user_id=user_id,
-            timer_id=timer_id,
+    if entry.stage is Stage.RESPAWN:
+        if entry.is_new_epoch:
+            text = f"✅ Босс **{boss_name}** возродился, скорее бегите его убивать!"
+        else:
+            text = f"✅ Босс **{boss_name}** возродился, скорее беги его убивать!"
+        coalescer.add(
+            chat_id,
+            Priority.RESPAWN,
+            text,
+            "✅ Возродились боссы, скорее бегите их убивать:",
+            f"**{boss_name}**",
+            entry.reply_to,
+            entry.fire_at,
         )
-        if not res:
-            await event.reply("❌ Проблема с доступом в базу данных")
-            backend_logger.error(
-                "Trouble with db when deleting timer into 'set_timer' function with is_new_epoch"
-            )
-            return
-        
         backend_logger.success(
-            f"In chat {chat_id} User {user_id} automatically deleted timer {timer_id}"
+            f"In chat {chat_id} User {user_id} response "
+            f"notification from timer {timer_id}"
         )
+
+        # The sweeper advances (or, for one-shot epoch timers, deletes) the
+        # rows of notified respawns in batches instead of one transaction per
+        # timer at the respawn minute
+        _fired_respawns.add(timer_id)
+        return not entry.is_new_epoch
+
+    # Re-arm: the next respawn is derived from the anchor, nothing is written
+    remaining_formatted_time = remaining_hh_mm(entry.interval.total_seconds())
+    timer_line = (
+        f"{wall_hh_mm(to_epoch(entry.respawn_time))} — "
+        f"**{boss_name}** ({remaining_formatted_time}) — `{timer_id}`\n"
+    )
+    coalescer.add(
+        chat_id,
+        Priority.CONFIRMATION,
+        f"✅ Установлен таймер :\n{timer_line}",
+        "✅ Установлены таймеры :",
+        timer_line,
+        entry.reply_to,
+        entry.fire_at,
+    )
+    backend_logger.success(
+        f"In chat {chat_id} User {user_id} automatically rearmed timer {timer_id}"
+    )
+    return True
+
+
+if SCHEDULER_BACKEND == 'wheel':
+    scheduler = TimingWheelScheduler(
+        handler=handle_timer_stage,
+        resolution=SCHEDULER_WHEEL_RESOLUTION,
+    )
+else:
+    scheduler = HeapScheduler(handler=handle_timer_stage)
+outbound = OutboundQueue(
+    send=send_message,
+    global_rate=OUTBOUND_GLOBAL_PER_SECOND,
+    chat_rate=OUTBOUND_CHAT_PER_MINUTE / 60,
+    chat_burst=OUTBOUND_CHAT_BURST,
+    workers=OUTBOUND_WORKERS,
+)
+coalescer = NotificationCoalescer(outbound=outbound, window=NOTIFY_COALESCE_WINDOW)
+metrics_server = MetricsServer(host=METRICS_HOST, port=METRICS_PORT)
+SCHEDULED_TIMERS.set_function(lambda: len(scheduler))
+OUTBOUND_DEPTH.set_function(lambda: len(outbound))
+DB_POOL.set_function(lambda: {(state,): value for state, value in db.pool_stats().items()})
+_client = None
+_missed_respawns: dict[str, list[str]] = {}
+_fired_respawns: set[str] = set()
+_sweeper_task = None
+
+
+async def start_scheduler(client):
+    global _client, _sweeper_task
+    _client = client
+    outbound.start()
+    scheduler.start()
+    board_updater.start()
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.create_task(sweep_timers_periodically())
+    if METRICS_PORT:
+        try:
+            await metrics_server.start()
+        except OSError as e:
+            backend_logger.error(f"Metrics server was not started: {str(e)}")
+    await notify_missed_respawns()
+
+
+async def restore_timers():
+    now = now_epoch()
+    missed, expired = [], []
+
+    async for timer in db.stream_timers():
+        if to_epoch(timer.respawn_time) < now:
+            # Rows move past a respawn only once it was notified, so this
+            # one happened while the bot was down
+            _missed_respawns.setdefault(timer.chat_id, []).append(timer.boss_name)
+            if timer.is_new_epoch:
+                expired.append(timer.timer_id)
+                continue
+            missed.append(timer.timer_id)
+
+        scheduler.schedule(TimerEntry(
+            timer_id=timer.timer_id,
+            chat_id=timer.chat_id,
+            boss_name=timer.boss_name,
+            user_id=None,
+            respawn_time=from_epoch(next_respawn_epoch(
+                to_epoch(timer.anchor_time), 
+                timer.interval_seconds, 
+                now, 
+                timer.is_new_epoch,
+            )),
+            interval=timedelta(seconds=timer.interval_seconds),
+            is_new_epoch=timer.is_new_epoch,
+        ))
+
+    if not await db.advance_timers(missed):
+        backend_logger.error("Trouble with db when advancing restored timers")
+    if not await db.delete_timers(expired):
+        backend_logger.error("Trouble with db when deleting expired epoch timers")
+
+    backend_logger.success(
+        f"Restored {len(scheduler)} timers: {len(expired)} expired, "
+        f"missed respawns in {len(_missed_respawns)} chats"
+    )
+
+
+async def restore_boards():
+    boards = await db.get_all_boards()
+    if boards is False:
+        backend_logger.error("Trouble with db when restoring boards")
         return
 
+    for board in boards:
+        board_updater.add(board.chat_id, board.message_id)
+    backend_logger.success(f"Restored {len(boards)} boards")
 
 
-    while True:
-        await event.reply(
-            f"✅ Установлен таймер :\n{system_to_user_tz(timer.respawn_time)} — "
-            f"**{timer.boss_name}** ({remaining_formatted_time}) — `{timer.timer_id}`\n"
-        )
-        
-        if time_to_notification > 0:
-            await asyncio.sleep(time_to_notification)
-            if not await db._get_timer(timer):
-                backend_logger.info(f"Timer {timer.timer_id} was already deleted")
-                return
-
-            await event.reply(f"‼️ Босс **{boss_name}** возродится через 3 минуты, будьте готовы!")
-            backend_logger.success(
-                f"In chat {chat_id} User {user_id} response "
-                f"notification from timer {timer.timer_id}"
-            )
+async def sweep_timers():
+    fired = list(_fired_respawns)
+    if not fired:
+        return
 
-            await asyncio.sleep(180)
-        else:
-            await asyncio.sleep(wait_seconds)
-        
-        if not await db._get_timer(timer):
-            backend_logger.info(f"Timer {timer.timer_id} was already deleted")
-            return
-        
-        await event.reply(f"✅ Босс **{boss_name}** возродился, скорее беги его убивать!")
-        backend_logger.success(
-            f"In chat {chat_id} User {user_id} response "
-            f"notification from timer {timer.timer_id}"
-        )
-        fake_dt = respawn_datetime + timedelta(days=7)
-        await db.update_timer(timer, fake_dt)
-        await asyncio.sleep(60)
-        if not await db._get_timer(timer):
-            backend_logger.info(f"Timer {timer.timer_id} was already deleted")
-            return
+    expired = await db.delete_expired_timers(fired, batch_size=TIMERS_SWEEP_BATCH_SIZE)
+    if expired is False:
+        backend_logger.error("Trouble with db when deleting expired timers")
+        return
+    for timer_id in expired:
+        scheduler.cancel(timer_id)
 
-        respawn_datetime += interval + timedelta(seconds=60)
-        timer = await db.update_timer(timer, respawn_datetime)
-        if not timer:
-            await event.reply("❌ Проблема с доступом в базу данных")
-            backend_logger.error(
-                "Trouble with db when updating timer into 'add_timer' function"
-            )
-            return
+    if not await db.advance_timers(fired, batch_size=TIMERS_SWEEP_BATCH_SIZE):
+        backend_logger.error("Trouble with db when advancing timers")
+        return
+    # Kept until written, so a failed pass is retried on the next one
+    _fired_respawns.difference_update(fired)
+
+
+async def sweep_timers_periodically():
+    try:
+        while True:
+            await asyncio.sleep(TIMERS_SWEEP_INTERVAL)
+            await sweep_timers()
+    finally:
+        # Respawns notified since the last pass are recorded before exiting,
+        # otherwise the next start would announce them again
+        await sweep_timers()
+
+
+async def notify_missed_respawns():
+    missed_respawns = dict(_missed_respawns)
+    _missed_respawns.clear()
+    if MISSED_NOTIFICATIONS_POLICY == 'skip':
+        return
 
+    for chat_id, bosses in missed_respawns.items():
+        if MISSED_NOTIFICATIONS_POLICY == 'fire':
+            texts = [
+                f"✅ Босс **{boss_name}** возродился, скорее беги его убивать!"
+                for boss_name in bosses
+            ]
+        else:
+            texts = [
+                "✅ Пока бот был недоступен, возродились боссы:\n"
+                + "\n".join(f"**{boss_name}**" for boss_name in bosses)
+            ]
+
+        for text in texts:
+            notify_chat(chat_id, text, Priority.RESPAWN)
         backend_logger.success(
-            f"In chat {chat_id} User {user_id} automatically updated timer {timer.timer_id}"
+            f"In chat {chat_id} notified about {len(bosses)} missed respawns"
         )
-        wait_seconds = interval.total_seconds()
-        time_to_notification = wait_seconds - 180
-        remaining_formatted_time = seconds_to_hh_mm(wait_seconds)
 
 
 async def get_bosses(chat_id: str, user_id: str, event):    
-    text_strings = list()
-    text_strings.append(f'Список всех боссов\n')
-
-    for boss in respawn_intervals:
-        respawn_time = respawn_intervals[boss][0]
-        boss_name = str(boss)
-        
-        text_strings.append(f"`{boss_name:<20}` | {respawn_time} hours")
-        text_message = "\n".join(text_strings)
-
-    await event.reply(text_message)
+    await event.reply(BOSSES_TEXT)
     backend_logger.success(f"In chat {chat_id} User {user_id} got boss-list")
 
 
@@ -237,6 +406,7 @@ async def delete_timer(user_id: str, chat_id: str, timer_id: str, event):
         backend_logger.error("Trouble with db when running 'delete_timer' function")
         return
 
+    scheduler.cancel(timer_id)
     await event.reply(f"✅ Таймер с ID {timer_id} удален")
     backend_logger.success(f"In chat {chat_id} User {user_id} "
                             f"succesfully deleted timer {timer_id}")
@@ -258,21 +428,53 @@ async def delete_all_timers(chat_id: str, user_id: str, event):
         backend_logger.error("Trouble with db when running 'delete_timer' function")
         return
 
+    scheduler.cancel_chat(chat_id)
     await event.reply("✅ Все таймеры успешно удалены")
     backend_logger.success(f"In chat {chat_id} User {user_id} "
                             f"succesfully deleted all timers")
 
 
-async def get_chat_timers(chat_id: str, timer_numbers: int, user_id: str, event):
-    user_info = await db.get_userinfo(user_id)
-    nickname = user_info[0]
-    firstname = user_info[1]
+def render_chat_timers(timers) -> str:
+    text_strings = list()
+    text_strings.append("**Ближайшие возрождения**\n")
+    now = now_epoch()
+
+    for timer in timers:
+        # Stored respawn_time of a recurring timer lags until the next sweep
+        respawn_time = next_respawn_epoch(
+            to_epoch(timer.anchor_time), 
+            timer.interval_seconds, 
+            now, 
+            timer.is_new_epoch,
+        )
+        remaining_formatted_time = remaining_hh_mm(respawn_time - now)
+
+        text_strings.append(
+        f"{wall_hh_mm(respawn_time)} — "
+        f"**{timer.boss_name}** ({remaining_formatted_time}) — `{timer.timer_id}`\n"
+        )
+
+    return "\n".join(text_strings)
 
 
-    if timer_numbers < 1:
+def render_expiry(timers) -> int | None:
+    # A shown epoch timer drops out of the list once it respawns
+    epoch_respawns = [to_epoch(timer.respawn_time) for timer in timers if timer.is_new_epoch]
+    return min(epoch_respawns, default=None)
+
+
+async def get_chat_timers(chat_id: str, timer_numbers: int, user_id: str, event):
+    count = max(timer_numbers, 0)
+    text_message = render_cache.get(chat_id, count, db.timer_cache.version(chat_id))
+    if text_message is not None:
+        await event.reply(text_message)
+        backend_logger.success(f"In chat {chat_id} User {user_id} got cached chat timers")
+        return
+
+    if count < 1:
         timers = await db.get_all_chat_timers(user_id, chat_id)
     else:
-        timers = await db.get_chat_timers(user_id, chat_id, timer_numbers)
+        timers = await db.get_chat_timers(user_id, chat_id, count)
     
     if timers is False:
         await event.reply("❌ Проблема с доступом в базу данных")
@@ -280,24 +482,18 @@ async def get_chat_timers(chat_id: str, timer_numbers: int, user_id: str, event)
         return
     
     if len(timers) < 1:
-        await event.reply("В данный момент нет ни одного активного таймера")
+        await event.reply(NO_TIMERS_TEXT)
         backend_logger.success(f"In chat {chat_id} User {user_id} got 0 chat timers")
         return
 
-    text_strings = list()
-    text_strings.append("**Ближайшие возрождения**\n")
-    now = system_tz.localize(datetime.now())
-
-    for timer in timers:
-        remaining_time = (timer.respawn_time - now).total_seconds()
-        remaining_formatted_time = seconds_to_hh_mm(remaining_time)
-
-        text_strings.append(
-        f"{system_to_user_tz(timer.respawn_time)} — "
-        f"**{timer.boss_name}** ({remaining_formatted_time}) — `{timer.timer_id}`\n"
-        )
-
-    text_message = "\n".join(text_strings)
+    text_message = render_chat_timers(timers)
+    render_cache.put(
+        chat_id, 
+        count, 
+        db.timer_cache.version(chat_id), 
+        text_message, 
+        render_expiry(timers),
+    )
     await event.reply(text_message)
     backend_logger.success(
         f"In chat {chat_id} User {user_id} got {len(timers)} chat timers"
@@ -305,43 +501,148 @@ async def get_chat_timers(chat_id: str, timer_numbers: int, user_id: str, event)
 
 
 async def epochs_timers_start(chat_id: str, user_id: str, event):
-    bosses = await db.get_all_boss_respawns(user_id=user_id)
-    if bosses is False:
+    now = now_epoch()
+    rows = []
+    for boss_name in respawn_intervals:
+        interval_seconds = respawn_interval_seconds(boss_name, is_new_epoch=True)
+        rows.append({
+            "boss_name": boss_name,
+            "respawn_time": from_epoch(now + interval_seconds),
+            "interval_seconds": interval_seconds,
+            "is_new_epoch": True,
+        })
+
+    timers = await db.add_timers(user_id=user_id, chat_id=chat_id, rows=rows)
+    if not timers:
         await event.reply(f"❌ Проблема с доступом в базу данных")
         backend_logger.error("Trouble with db when running 'epochs_timers_start' function")
         return
 
-    tasks = []
-    for boss in bosses:
-
-        tasks.append(asyncio.create_task(set_timer(
+    entries = []
+    for timer, replaced_timer_id in timers:
+        if replaced_timer_id:
+            scheduler.cancel(replaced_timer_id)
+        entries.append(TimerEntry(
+            timer_id=timer.timer_id,
             chat_id=chat_id,
-            boss_name=boss.boss_name,
-            kill_time_str=None,
+            boss_name=timer.boss_name,
             user_id=user_id,
-            event=event,
+            respawn_time=timer.respawn_time,
+            interval=timedelta(seconds=timer.interval_seconds),
             is_new_epoch=True,
-        )))
-    
+            reply_to=event.message.id,
+        ))
+    scheduler.schedule_many(entries)
+    backend_logger.success(
+        f"In chat {chat_id} User {user_id} created {len(entries)} epoch timers"
+    )
+
     await event.reply(
         f"✅ Таймеры на респаун всех боссов успешно установлены. Подробную информацию "
         f"можно получить по команде `/get`\n"
     )
-    await asyncio.gather(*tasks)
 
 
+async def render_board(chat_id: str) -> str | None:
+    text = render_cache.get(chat_id, 0, db.timer_cache.version(chat_id))
+    if text is not None:
+        return text
 
-async def start_chat(chat_id: str, chat, participants, event):
-    for p in participants:
-        user_id = str(p.id)
-        nickname = p.username
-        firstname = p.first_name
-        res = await db.add_userinfo(user_id, nickname, firstname)
+    timers = await db.get_all_chat_timers("board", chat_id)
+    if timers is False:
+        return None
+    if len(timers) < 1:
+        return NO_TIMERS_TEXT
+    text = render_chat_timers(timers)
+    render_cache.put(chat_id, 0, db.timer_cache.version(chat_id), text, render_expiry(timers))
+    return text
+
+
+async def edit_message(chat_id: str, message_id: int, text: str):
+    await _client.edit_message(int(chat_id), message_id, text)
+
+
+board_updater = BoardUpdater(
+    render=render_board, 
+    edit=edit_message, 
+    outbound=outbound,
+    db=db,
+    interval=BOARD_UPDATE_INTERVAL,
+)
+
+
+async def set_board(chat_id: str, user_id: str, enable: bool, event):
+    if not enable:
+        res = await db.delete_board(chat_id)
+        if res == 'no_board':
+            await event.reply("❌ В беседе нет табло таймеров")
+            return
         if not res:
-            backend_logger.error(f"Trouble with db when adding User {user_id}")
+            await event.reply("❌ Проблема с доступом в базу данных")
+            backend_logger.error("Trouble with db when running 'set_board' function")
+            return
+
+        board_updater.remove(chat_id)
+        try:
+            await event.client.unpin_message(event.chat_id, res)
+        except Exception as e:
+            backend_logger.info(f"In chat {chat_id} board was not unpinned: {str(e)}")
+        await event.reply("✅ Табло таймеров отключено")
+        backend_logger.success(f"In chat {chat_id} User {user_id} disabled board")
+        return
+
+    text = await render_board(chat_id)
+    if text is None:
+        await event.reply("❌ Проблема с доступом в базу данных")
+        backend_logger.error("Trouble with db when running 'set_board' function")
+        return
+
+    message = await event.respond(text)
+    if not await db.set_board(chat_id, message.id):
+        await event.reply("❌ Проблема с доступом в базу данных")
+        backend_logger.error("Trouble with db when running 'set_board' function")
+        return
+
+    # A repeated /board on replaces the board, the old pin must not linger
+    old_message_id = board_updater.remove(chat_id)
+    board_updater.add(chat_id, message.id, text)
+    if old_message_id is not None and old_message_id != message.id:
+        try:
+            await event.client.unpin_message(event.chat_id, old_message_id)
+        except Exception as e:
+            backend_logger.info(f"In chat {chat_id} old board was not unpinned: {str(e)}")
+    try:
+        await event.client.pin_message(event.chat_id, message, notify=False)
+    except Exception as e:
+        backend_logger.info(f"In chat {chat_id} board was not pinned: {str(e)}")
+    backend_logger.success(f"In chat {chat_id} User {user_id} enabled board {message.id}")
+
+
+async def start_chat(chat_id: str, chat, participants, event):
+    batch = []
+    imported = 0
+    async for p in participants:
+        batch.append({
+            "user_id": str(p.id),
+            "user_nickname": p.username or "",
+            "user_firstname": p.first_name or "",
+        })
+        if len(batch) < USERS_IMPORT_BATCH_SIZE:
+            continue
+
+        if await db.add_userinfos(batch) is False:
+            backend_logger.error(f"Trouble with db when adding users of chat {chat_id}")
             return
+        imported += len(batch)
+        batch.clear()
+        backend_logger.info(f"In chat {chat_id} imported {imported} users")
+
+    if await db.add_userinfos(batch) is False:
+        backend_logger.error(f"Trouble with db when adding users of chat {chat_id}")
+        return
+    imported += len(batch)
 
-    backend_logger.success(f"In chat {chat_id} users was added to Database")
+    backend_logger.success(f"In chat {chat_id} {imported} users was added to Database")
 
     await event.reply(
         "Привет! Я помогу тебе не проспать сражение с ботом и "
@@ -0,0 +1,68 @@
+# Measures how much event-loop time the database/backend success logging
+# takes with synchronous sinks versus the queue-backed ones, and what SUCCESS
+# sampling saves. Run from the repository root with the bot's .env in place:
+#   python -m benchmarks.bench_logging --records 20000
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from loguru import logger
+
+from utils.logger import backend_logger, database_logger, configure_logging, stop_logging
+
+
+async def log_burst(records: int) -> list[float]:
+    durations = []
+    for i in range(records):
+        start = time.perf_counter()
+        database_logger.success(f"User {i} got all chat timers")
+        backend_logger.success(f"In chat -100{i % 500} User {i} got 5 chat timers")
+        durations.append(time.perf_counter() - start)
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    return durations
+
+
+async def run(records: int, serialize: bool):
+    print(
+        f"{'mode':<22}{'records':>10}{'loop, ms':>12}{'mean, us':>12}"
+        f"{'p99, us':>12}{'max, us':>12}{'flush, ms':>12}"
+    )
+    modes = (
+        ("sync", False, 1),
+        ("enqueue", True, 1),
+        ("enqueue + sample 1/10", True, 10),
+    )
+    for name, enqueue, sample_every in modes:
+        with tempfile.TemporaryDirectory() as log_dir:
+            configure_logging(
+                log_dir=log_dir,
+                sample_every=sample_every,
+                serialize=serialize,
+                enqueue=enqueue,
+                console=False,
+            )
+            durations = await log_burst(records)
+            # Time for the background writer to drain what the loop handed off
+            start = time.perf_counter()
+            await logger.complete()
+            stop_logging()
+            flush = time.perf_counter() - start
+
+        durations.sort()
+        print(
+            f"{name:<22}{records * 2:>10}{sum(durations) * 1000:>12.1f}"
+            f"{statistics.fmean(durations) * 1e6:>12.1f}"
+            f"{durations[int(len(durations) * 0.99)] * 1e6:>12.1f}"
+            f"{durations[-1] * 1e6:>12.1f}{flush * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.json))
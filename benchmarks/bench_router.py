@@ -0,0 +1,133 @@
+# Compares the old eight NewMessage(pattern=...) handlers with the single
+# CommandRouter dispatcher on a stream of mostly ordinary chat messages.
+# Run from the repository root:
+#   python -m benchmarks.bench_router --messages 200000 --command-share 0.01
+import argparse
+import asyncio
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from intervals import respawn_intervals
+from utils.router import (
+    CommandRouter,
+    any_args,
+    parse_set_args,
+    parse_timer_id,
+    parse_timer_numbers,
+    parse_board_switch,
+)
+
+# Patterns of the handlers main.py registered before the router
+LEGACY_PATTERNS = [
+    re.compile(r'/bosses'),
+    re.compile(r'/set\s+(.+?)\s*(\d{1,2}:\d{2})?$'),
+    re.compile('/all_start'),
+    re.compile(r'^/delete(?!_)\s*([\w-]+)$'),
+    re.compile(r'/delete_all_timers'),
+    re.compile(r'^/get(?!_my)(?:@\w+)?(?:\s+(\d+))?$'),
+    re.compile(r'^/start(@\w+)?$'),
+    re.compile(r'^/board(?:@\w+)?(?:\s+(on|off))?$'),
+    re.compile(r'^/info(@\w+)?$'),
+    re.compile(r'^/help(@\w+)?$'),
+]
+
+CHATTER = [
+    "кто идет на босса?",
+    "я через 5 минут буду",
+    "Базил опять без нас убили",
+    "ок",
+    "https://example.com/guide что скажете",
+    "вчера до 3 ночи фармили, сегодня отдыхаю",
+]
+
+
+def make_commands() -> list[str]:
+    bosses = list(respawn_intervals)
+    return [
+        f"/set {random.choice(bosses).lower()} {random.randint(0, 23)}:{random.randint(10, 59)}",
+        f"/set {random.choice(bosses).lower()}",
+        "/get",
+        "/get 5",
+        "/get@timer_bot 3",
+        "/delete 3f1c2d4e-5b6a-4c7d-8e9f-0a1b2c3d4e5f",
+        "/bosses",
+        "/help",
+        "/board on",
+    ]
+
+
+def make_messages(count: int, command_share: float) -> list[SimpleNamespace]:
+    commands = make_commands()
+    messages = []
+    for _ in range(count):
+        if random.random() < command_share:
+            text = random.choice(commands)
+        else:
+            text = random.choice(CHATTER)
+        messages.append(SimpleNamespace(message=SimpleNamespace(message=text)))
+    return messages
+
+
+async def _noop_handler(event, *args):
+    return None
+
+
+async def bench_legacy(messages: list[SimpleNamespace]) -> tuple[float, int]:
+    matched = 0
+    start = time.perf_counter()
+    for event in messages:
+        text = event.message.message
+        # Telethon runs every registered handler's pattern against each message
+        for pattern in LEGACY_PATTERNS:
+            match = pattern.match(text)
+            if match:
+                matched += 1
+                await _noop_handler(event, *match.groups())
+    return time.perf_counter() - start, matched
+
+
+async def bench_router(messages: list[SimpleNamespace]) -> tuple[float, int]:
+    router = CommandRouter(bot_username="timer_bot")
+    for command, parser in (
+        ("bosses", any_args),
+        ("set", parse_set_args),
+        ("all_start", any_args),
+        ("delete", parse_timer_id),
+        ("delete_all_timers", any_args),
+        ("get", parse_timer_numbers),
+        ("start", None),
+        ("board", parse_board_switch),
+        ("info", None),
+        ("help", None),
+    ):
+        if parser is None:
+            router.add(command, _noop_handler)
+        else:
+            router.add(command, _noop_handler, parser)
+
+    start = time.perf_counter()
+    for event in messages:
+        await router.dispatch(event)
+    return time.perf_counter() - start, router.routed
+
+
+async def run(count: int, command_share: float):
+    random.seed(0)
+    messages = make_messages(count, command_share)
+    print(f"{'dispatcher':<12}{'messages':>10}{'routed':>10}{'time, s':>10}{'msg/s':>14}")
+    for name, bench in (("regex x10", bench_legacy), ("router", bench_router)):
+        elapsed, routed = await bench(messages)
+        print(
+            f"{name:<12}{count:>10}{routed:>10}{elapsed:>10.3f}"
+            f"{count / elapsed:>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--command-share", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.command_share))
@@ -0,0 +1,140 @@
+# Compares the old sleep-per-timer approach of set_timer with the heap and
+# timing-wheel schedulers. Run from the repository root:
+#   python -m benchmarks.bench_scheduler --timers 10000 100000
+import argparse
+import asyncio
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from intervals import respawn_intervals
+from scheduler.base import TimerEntry
+from scheduler.heap_scheduler import HeapScheduler
+from scheduler.timing_wheel import TimingWheelScheduler
+
+
+async def _noop_handler(entry: TimerEntry) -> bool:
+    return True
+
+
+def make_entries(count: int, now: datetime) -> list[TimerEntry]:
+    bosses = list(respawn_intervals.items())
+    entries = []
+    for i in range(count):
+        boss_name, (hours, _) = random.choice(bosses)
+        interval = timedelta(hours=hours)
+        respawn_time = now + timedelta(minutes=random.randint(4, hours * 60))
+        entries.append(TimerEntry(
+            timer_id=str(i),
+            chat_id=str(i % 5000),
+            boss_name=boss_name,
+            user_id=None,
+            respawn_time=respawn_time,
+            interval=interval,
+        ))
+    return entries
+
+
+async def _sleeping_timer(entry: TimerEntry, now: datetime):
+    # Shape of the original set_timer: one coroutine parked per timer.
+    await asyncio.sleep((entry.respawn_time - now).total_seconds() - 180)
+
+
+async def bench_sleep_per_timer(entries: list[TimerEntry], now: datetime) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(_sleeping_timer(entry, now)) for entry in entries]
+    await asyncio.sleep(0)
+    insert_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        await asyncio.sleep(0)
+    tick_time = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    for task in tasks[::10]:
+        task.cancel()
+    await asyncio.sleep(0)
+    cancel_time = time.perf_counter() - start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "insert": insert_time,
+        "cancel_10%": cancel_time,
+        "tick": tick_time,
+        "memory_mb": memory / 2**20,
+        "tasks": len(tasks),
+    }
+
+
+def bench_scheduler(scheduler, entries: list[TimerEntry], now: datetime) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for entry in entries:
+        scheduler.schedule(entry)
+    insert_time = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for entry in entries[::10]:
+        scheduler.cancel(entry.timer_id)
+    cancel_time = time.perf_counter() - start
+
+    # One simulated minute of ticks at a time over the next hour.
+    base = now.timestamp()
+    ticks = []
+    for minute in range(1, 61):
+        start = time.perf_counter()
+        scheduler._pop_due(base + minute * 60)
+        ticks.append(time.perf_counter() - start)
+
+    return {
+        "insert": insert_time,
+        "cancel_10%": cancel_time,
+        "tick": sum(ticks) / len(ticks),
+        "memory_mb": memory / 2**20,
+        "tasks": 1,
+    }
+
+
+async def run(counts: list[int]):
+    random.seed(0)
+    print(
+        f"{'backend':<16}{'timers':>10}{'insert, s':>12}{'cancel, s':>12}"
+        f"{'tick, ms':>12}{'memory, MB':>12}{'tasks':>10}"
+    )
+    for count in counts:
+        now = datetime.now(timezone.utc)
+        backends = {
+            "sleep-per-timer": None,
+            "heap": HeapScheduler(handler=_noop_handler),
+            "timing-wheel": TimingWheelScheduler(handler=_noop_handler),
+        }
+        for name, scheduler in backends.items():
+            entries = make_entries(count, now)
+            if scheduler is None:
+                result = await bench_sleep_per_timer(entries, now)
+            else:
+                result = bench_scheduler(scheduler, entries, now)
+            print(
+                f"{name:<16}{count:>10}{result['insert']:>12.3f}"
+                f"{result['cancel_10%']:>12.3f}{result['tick'] * 1000:>12.3f}"
+                f"{result['memory_mb']:>12.1f}{result['tasks']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timers", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.timers))
@@ -0,0 +1,143 @@
+# Offline stand-ins for Telethon used by the command benchmarks and the replay
+# tool: events and a client that record what the bot would have sent, plus
+# round-trip counting on the engine of backend_logic.db. DATABASE_URL decides
+# which storage is driven: a scratch Postgres, a SQLite file or memory://.
+import itertools
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import event as sa_event
+
+_message_ids = itertools.count(1)
+
+
+@dataclass
+class FakeUser:
+    id: int
+    username: str
+    first_name: str
+
+
+@dataclass
+class FakeMessage:
+    chat_id: str
+    message: str
+    id: int = field(default_factory=lambda: next(_message_ids))
+    reply_to: int | None = None
+
+
+class FakeClient():
+    def __init__(self, participants_per_chat: int = 50):
+        self.participants_per_chat = participants_per_chat
+        self.sent: list[FakeMessage] = []
+        self.edits = 0
+        self.pins = 0
+
+    async def send_message(self, chat_id, text: str, reply_to: int | None = None) -> FakeMessage:
+        message = FakeMessage(chat_id=str(chat_id), message=text, reply_to=reply_to)
+        self.sent.append(message)
+        return message
+
+    async def edit_message(self, chat_id, message_id: int, text: str) -> None:
+        self.edits += 1
+
+    async def pin_message(self, chat_id, message, notify: bool = False) -> None:
+        self.pins += 1
+
+    async def unpin_message(self, chat_id, message) -> None:
+        self.pins -= 1
+
+    async def iter_participants(self, chat):
+        base = abs(int(chat.id)) * 1000
+        for i in range(self.participants_per_chat):
+            yield FakeUser(id=base + i, username=f"user{base + i}", first_name=f"User {i}")
+
+
+@dataclass
+class FakeChat:
+    id: int
+
+
+class FakeEvent():
+    def __init__(self, client: FakeClient, chat_id: int, sender_id: int, text: str):
+        self.client = client
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.message = FakeMessage(chat_id=str(chat_id), message=text)
+        self.replies: list[FakeMessage] = []
+
+    async def reply(self, text: str) -> FakeMessage:
+        message = await self.client.send_message(self.chat_id, text, reply_to=self.message.id)
+        self.replies.append(message)
+        return message
+
+    async def respond(self, text: str) -> FakeMessage:
+        message = await self.client.send_message(self.chat_id, text)
+        self.replies.append(message)
+        return message
+
+    async def get_chat(self) -> FakeChat:
+        return FakeChat(id=self.chat_id)
+
+
+DB_ERROR_REPLY = "❌ Проблема с доступом в базу данных"
+
+
+def count_db_errors(messages: list[FakeMessage]) -> int:
+    return sum(1 for message in messages if message.message.startswith(DB_ERROR_REPLY))
+
+
+class RoundTripCounter():
+    # Counts statements sent to the database, i.e. network round-trips
+    def __init__(self, engine):
+        # memory:// has no engine and no round-trips to count
+        self.engine = engine.sync_engine if engine is not None else None
+        self.count = 0
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+    def __enter__(self):
+        if self.engine is not None:
+            sa_event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.engine is not None:
+            sa_event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        return False
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    round_trips: int = 0
+    db_errors: int = 0
+    elapsed: float = 0.0
+
+    def row(self) -> str:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        if not count:
+            return f"{self.name:<16}{0:>10}"
+        return (
+            f"{self.name:<16}{count:>10}{count / self.elapsed:>12.1f}"
+            f"{statistics.median(latencies) * 1000:>12.2f}"
+            f"{latencies[min(int(count * 0.99), count - 1)] * 1000:>12.2f}"
+            f"{self.round_trips / count:>12.2f}{self.db_errors:>10}"
+        )
+
+    @staticmethod
+    def header() -> str:
+        return (
+            f"{'phase':<16}{'commands':>10}{'cmd/s':>12}{'p50, ms':>12}"
+            f"{'p99, ms':>12}{'db rt/cmd':>12}{'db errors':>10}"
+        )
+
+
+async def timed_call(stats: PhaseStats, coro) -> None:
+    start = time.perf_counter()
+    await coro
+    stats.latencies.append(time.perf_counter() - start)
@@ -0,0 +1,216 @@
+# Replays captured traffic through the bot's command router against
+# FakeClient and the database in DATABASE_URL. The capture is either the
+# bot's text log (the `In chat X User Y used ...` lines of the main.py
+# handlers) or JSONL: serialized loguru records or {"ts", "chat_id",
+# "user_id", "text"} per line. Original inter-arrival times are kept, divided
+# by --speed (0 fires everything at once); --clones multiplies the traffic
+# into extra chats, e.g. to reproduce every clan running /all_start after
+# server maintenance. Use a scratch database. Run from the repository root:
+#   python -m benchmarks.replay logs/backend.log --speed 60 --clones 10
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from benchmarks.harness import DB_ERROR_REPLY, FakeClient, FakeEvent, RoundTripCounter
+from utils.logger import configure_logging, stop_logging
+
+import backend_logic
+from backend_logic import db, outbound
+from main import build_router
+
+MESSAGE = re.compile(r"In chat (?P<chat>-?\d+) User (?P<user>-?\d+) used? `(?P<text>.*)`\s*$")
+LOG_LINE = re.compile(r"(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}).*?" + MESSAGE.pattern)
+# Clone k of a chat lives k * CLONE_STRIDE below it, far from real chat ids
+CLONE_STRIDE = 10**13
+
+
+@dataclass
+class Command:
+    ts: float
+    chat_id: int
+    user_id: int
+    text: str
+
+
+def parse_json_line(line: str) -> Command | None:
+    data = json.loads(line)
+    record = data.get("record")
+    if record is None:
+        return Command(
+            ts=float(data["ts"]),
+            chat_id=int(data["chat_id"]),
+            user_id=int(data["user_id"]),
+            text=data["text"],
+        )
+    match = MESSAGE.search(record["message"])
+    if match is None:
+        return None
+    return Command(
+        ts=record["time"]["timestamp"],
+        chat_id=int(match["chat"]),
+        user_id=int(match["user"]),
+        text=match["text"],
+    )
+
+
+def parse_text_line(line: str) -> Command | None:
+    match = LOG_LINE.search(line)
+    if match is None:
+        return None
+    return Command(
+        ts=datetime.strptime(match["time"], "%Y-%m-%d %H:%M:%S").timestamp(),
+        chat_id=int(match["chat"]),
+        user_id=int(match["user"]),
+        text=match["text"],
+    )
+
+
+def load_capture(path: str) -> list[Command]:
+    commands = []
+    with open(path, encoding="utf-8") as capture:
+        for line in capture:
+            line = line.strip()
+            if not line:
+                continue
+            command = parse_json_line(line) if line[0] == "{" else parse_text_line(line)
+            if command is not None:
+                commands.append(command)
+    commands.sort(key=lambda command: command.ts)
+    return commands
+
+
+def clone(commands: list[Command], clones: int) -> list[Command]:
+    # Each clone replays the same traffic in its own chat, same moments
+    cloned = list(commands)
+    for k in range(1, clones):
+        cloned.extend(
+            Command(ts=c.ts, chat_id=c.chat_id - k * CLONE_STRIDE, user_id=c.user_id, text=c.text)
+            for c in commands
+        )
+    cloned.sort(key=lambda command: command.ts)
+    return cloned
+
+
+@dataclass
+class CommandStats:
+    latencies: list[float] = field(default_factory=list)
+    lateness: list[float] = field(default_factory=list)
+    db_errors: int = 0
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Replayer():
+    def __init__(self, client: FakeClient, speed: float):
+        self.client = client
+        self.speed = speed
+        self.router = build_router()
+        self.stats: dict[str, CommandStats] = defaultdict(CommandStats)
+        self.ignored = 0
+
+    async def _run(self, command: Command, due: float) -> None:
+        route = self.router.resolve(command.text)
+        if route is None:
+            self.ignored += 1
+            return
+        stats = self.stats[route[0]]
+        event = FakeEvent(self.client, command.chat_id, command.user_id, command.text)
+        start = time.perf_counter()
+        stats.lateness.append(max(0.0, start - due))
+        await self.router.dispatch(event)
+        stats.latencies.append(time.perf_counter() - start)
+        stats.db_errors += sum(1 for reply in event.replies if reply.message.startswith(DB_ERROR_REPLY))
+
+    async def replay(self, commands: list[Command]) -> float:
+        tasks = []
+        origin = commands[0].ts
+        start = time.perf_counter()
+        for command in commands:
+            due = start
+            if self.speed:
+                due += (command.ts - origin) / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._run(command, due)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self) -> None:
+        print(
+            f"{'command':<20}{'count':>8}{'p50, ms':>12}{'p99, ms':>12}"
+            f"{'late p99, ms':>14}{'db errors':>11}"
+        )
+        for name, stats in sorted(self.stats.items()):
+            print(
+                f"{name:<20}{len(stats.latencies):>8}"
+                f"{statistics.median(stats.latencies) * 1000:>12.2f}"
+                f"{percentile(stats.latencies, 0.99) * 1000:>12.2f}"
+                f"{percentile(stats.lateness, 0.99) * 1000:>14.2f}{stats.db_errors:>11}"
+            )
+
+
+async def run(path: str, speed: float, clones: int, participants: int):
+    commands = clone(load_capture(path), clones)
+    if not commands:
+        print(f"No commands found in {path}")
+        return
+
+    await db.create_tables()
+    await db.initialize_boss_respawns()
+
+    client = FakeClient(participants_per_chat=participants)
+    backend_logic._client = client
+    outbound.start()
+
+    chats = {command.chat_id for command in commands}
+    replayer = Replayer(client, speed)
+    try:
+        with RoundTripCounter(db.engine) as counter:
+            elapsed = await replayer.replay(commands)
+    finally:
+        for chat_id in chats:
+            await db.delete_all_timers_in_chat(str(chat_id))
+            backend_logic.scheduler.cancel_chat(str(chat_id))
+
+    span = commands[-1].ts - commands[0].ts
+    routed = len(commands) - replayer.ignored
+    print(
+        f"{len(commands)} commands in {len(chats)} chats, captured over {span:.0f}s, "
+        f"replayed in {elapsed:.2f}s (speed={speed or 'max'}, clones={clones}, db={db.backend_name})"
+    )
+    replayer.report()
+    print(
+        f"ignored: {replayer.ignored}, db round-trips/cmd: {counter.count / max(routed, 1):.2f}, "
+        f"replies recorded: {len(client.sent)}, outbound pending: {len(outbound)}"
+    )
+    await db.close()
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory(prefix="replay-logs-") as log_dir:
+        configure_logging(log_dir=log_dir, console=False)
+        try:
+            await run(args.capture, args.speed, args.clones, args.participants)
+        finally:
+            stop_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("capture", help="bot log file or JSONL capture")
+    parser.add_argument("--speed", type=float, default=1, help="time multiplier, 0 for no pauses")
+    parser.add_argument("--clones", type=int, default=1, help="copies of the traffic in distinct chats")
+    parser.add_argument("--participants", type=int, default=50, help="members per chat for /start")
+    args = parser.parse_args()
+    asyncio.run(main(args))
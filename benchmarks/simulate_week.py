@@ -0,0 +1,146 @@
+# Fast-forwards recurring timers of many chats through simulated days on a
+# VirtualClock, driving the scheduler directly with run_due(). Scheduler only:
+# the handler is a stub that counts the stages fired, nothing goes through
+# handle_timer_stage, the coalescer or the outbound queue, so the counts are
+# stage counts, not notifications sent. Reports them against the analytically
+# expected respawns, with firing drift, cadence errors (respawns off the
+# anchor + k * (interval + grace) grid), CPU time and peak RSS. Run from the
+# repository root with the bot's .env in place:
+#   python -m benchmarks.simulate_week --chats 2000 --bosses 10 --days 7
+import argparse
+import asyncio
+import random
+import resource
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from intervals import RESPAWN_GRACE, respawn_intervals
+from scheduler.base import Stage, TimerEntry, WARNING_OFFSET
+from scheduler.heap_scheduler import HeapScheduler
+from scheduler.timing_wheel import TimingWheelScheduler
+from utils.clock import SystemClock, VirtualClock, set_clock
+from utils.epoch_time import wall_hh_mm
+
+
+class SimulationStats():
+    def __init__(self, clock: VirtualClock, anchors: dict[str, tuple[float, int]]):
+        self.clock = clock
+        self.anchors = anchors          # timer_id -> (anchor, period)
+        self.stages: Counter[Stage] = Counter()
+        self.max_drift = 0.0
+        self.total_drift = 0.0
+        self.cadence_errors = 0
+        self.rendered = 0
+
+    async def handler(self, entry: TimerEntry) -> bool:
+        drift = self.clock.time() - entry.fire_at
+        self.max_drift = max(self.max_drift, drift)
+        self.total_drift += drift
+        self.stages[entry.stage] += 1
+
+        if entry.stage is Stage.RESPAWN:
+            anchor, period = self.anchors[entry.timer_id]
+            if (entry.respawn_time.timestamp() - anchor) % period:
+                self.cadence_errors += 1
+        # Stand-in for the formatting a real stage handler does
+        wall_hh_mm(int(entry.respawn_time.timestamp()))
+        self.rendered += 1
+        return True
+
+
+def make_entries(chats: int, bosses: int, start: float) -> tuple[list[TimerEntry], dict]:
+    names = list(respawn_intervals)
+    entries, anchors = [], {}
+    for chat in range(chats):
+        for boss_name in random.sample(names, bosses):
+            interval = respawn_intervals[boss_name][0] * 3600
+            anchor = start + random.randint(WARNING_OFFSET + 60, interval)
+            timer_id = f"{chat}:{boss_name}"
+            anchors[timer_id] = (anchor, interval + RESPAWN_GRACE)
+            entries.append(TimerEntry(
+                timer_id=timer_id,
+                chat_id=str(-chat),
+                boss_name=boss_name,
+                user_id=None,
+                respawn_time=datetime.fromtimestamp(anchor, timezone.utc),
+                interval=timedelta(seconds=interval),
+            ))
+    return entries, anchors
+
+
+def expected_respawns(anchors: dict, end: float) -> int:
+    return sum(int((end - anchor) // period) + 1 for anchor, period in anchors.values() if anchor <= end)
+
+
+async def simulate(backend: str, chats: int, bosses: int, days: float, resolution: float) -> dict:
+    random.seed(0)
+    start = float(int(time.time()) // 60 * 60)
+    end = start + days * 86400
+    clock = VirtualClock(start)
+    set_clock(clock)
+    try:
+        entries, anchors = make_entries(chats, bosses, start)
+        stats = SimulationStats(clock, anchors)
+        if backend == "wheel":
+            scheduler = TimingWheelScheduler(handler=stats.handler, resolution=resolution)
+        else:
+            scheduler = HeapScheduler(handler=stats.handler)
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        scheduler.schedule_many(entries)
+        steps = 0
+        while True:
+            deadline = scheduler.next_deadline()
+            if deadline is None or deadline > end:
+                break
+            clock.set(deadline)
+            await scheduler.run_due(clock.time())
+            steps += 1
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    finally:
+        set_clock(SystemClock())
+
+    fired = sum(stats.stages.values())
+    return {
+        "timers": len(entries),
+        "warnings": stats.stages[Stage.WARNING],
+        "respawns": stats.stages[Stage.RESPAWN],
+        "expected": expected_respawns(anchors, end),
+        "rearms": stats.stages[Stage.REARM],
+        "cadence_errors": stats.cadence_errors,
+        "mean_drift": stats.total_drift / fired if fired else 0.0,
+        "max_drift": stats.max_drift,
+        "steps": steps,
+        "cpu": cpu,
+        "wall": wall,
+        "rss_mb": peak / 2**20,
+    }
+
+
+async def run(chats: int, bosses: int, days: float, resolution: float):
+    print(f"{chats} chats x {bosses} bosses, {days} simulated days")
+    print(
+        f"{'backend':<8}{'timers':>8}{'warnings':>10}{'respawns':>10}{'expected':>10}"
+        f"{'rearms':>9}{'cadence':>9}{'drift avg/max, s':>18}{'steps':>8}"
+        f"{'cpu, s':>8}{'wall, s':>9}{'rss, MB':>10}"
+    )
+    for backend in ("heap", "wheel"):
+        result = await simulate(backend, chats, bosses, days, resolution)
+        print(
+            f"{backend:<8}{result['timers']:>8}{result['warnings']:>10}{result['respawns']:>10}"
+            f"{result['expected']:>10}{result['rearms']:>9}{result['cadence_errors']:>9}"
+            f"{result['mean_drift']:>9.2f}/{result['max_drift']:<8.2f}{result['steps']:>8}"
+            f"{result['cpu']:>8.2f}{result['wall']:>9.2f}{result['rss_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--bosses", type=int, default=10, help="recurring timers per chat")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--resolution", type=float, default=60, help="timing-wheel tick, seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.chats, args.bosses, args.days, args.resolution))
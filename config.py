@@ -8,5 +8,40 @@ API_ID = int(os.getenv('API_ID'))
 API_HASH = str(os.getenv('API_HASH'))
 BOT_TOKEN = str(os.getenv('BOT_TOKEN'))
 SESSIONS_DIRECTORY = os.getenv('SESSIONS_DIRECTORY')
-DATABASE_URL = os.getenv('DATABASE_URL')
-DATABASE_ECHO = bool(os.getenv('DATABASE_ECHO'))
+DATABASE_URL = os.getenv('DATABASE_URL')  # postgresql+asyncpg://... | sqlite+aiosqlite:///timers.db | memory://
+DATABASE_ECHO = os.getenv('DATABASE_ECHO', 'false').lower() in ('1', 'true', 'yes')
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', 10))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', 20))
+DATABASE_POOL_TIMEOUT = float(os.getenv('DATABASE_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+DATABASE_POOL_RECYCLE = int(os.getenv('DATABASE_POOL_RECYCLE', 1800))  # -1 never recycles
+DATABASE_POOL_PRE_PING = os.getenv('DATABASE_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv('DATABASE_STATEMENT_CACHE_SIZE', 500))  # asyncpg, 0 behind pgbouncer
+SCHEDULER_BACKEND = os.getenv('SCHEDULER_BACKEND', 'heap')
+SCHEDULER_WHEEL_RESOLUTION = float(os.getenv('SCHEDULER_WHEEL_RESOLUTION', 60))
+MISSED_NOTIFICATIONS_POLICY = os.getenv('MISSED_NOTIFICATIONS_POLICY', 'coalesce')  # fire | skip | coalesce
+TIMERS_SWEEP_INTERVAL = int(os.getenv('TIMERS_SWEEP_INTERVAL', 30))
+TIMERS_SWEEP_BATCH_SIZE = int(os.getenv('TIMERS_SWEEP_BATCH_SIZE', 1000))
+USERS_IMPORT_BATCH_SIZE = int(os.getenv('USERS_IMPORT_BATCH_SIZE', 300))
+OUTBOUND_GLOBAL_PER_SECOND = float(os.getenv('OUTBOUND_GLOBAL_PER_SECOND', 25))
+OUTBOUND_CHAT_PER_MINUTE = float(os.getenv('OUTBOUND_CHAT_PER_MINUTE', 20))
+OUTBOUND_CHAT_BURST = float(os.getenv('OUTBOUND_CHAT_BURST', 5))
+OUTBOUND_WORKERS = int(os.getenv('OUTBOUND_WORKERS', 4))
+NOTIFY_COALESCE_WINDOW = float(os.getenv('NOTIFY_COALESCE_WINDOW', 5))
+BOARD_UPDATE_INTERVAL = float(os.getenv('BOARD_UPDATE_INTERVAL', 60))
+TIMER_CACHE_MAX_CHATS = int(os.getenv('TIMER_CACHE_MAX_CHATS', 10000))
+RENDER_CACHE_MAX_ENTRIES = int(os.getenv('RENDER_CACHE_MAX_ENTRIES', 10000))
+LOG_DIR = os.getenv('LOG_DIR', 'logs')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # text | json
+LOG_ENQUEUE = os.getenv('LOG_ENQUEUE', 'true').lower() in ('1', 'true', 'yes')
+LOG_LEVELS = {
+    'BACKEND': os.getenv('LOG_LEVEL_BACKEND', 'DEBUG').upper(),
+    'DATABASE': os.getenv('LOG_LEVEL_DATABASE', 'DEBUG').upper(),
+}
+LOG_SUCCESS_SAMPLE_EVERY = int(os.getenv('LOG_SUCCESS_SAMPLE_EVERY', 1))
+LOG_QUEUE_MAX_LINES = int(os.getenv('LOG_QUEUE_MAX_LINES', 100000))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # 0 disables the endpoint
+LOOP_MONITOR = os.getenv('LOOP_MONITOR', 'false').lower() in ('1', 'true', 'yes')
+LOOP_MONITOR_INTERVAL = float(os.getenv('LOOP_MONITOR_INTERVAL', 0.5))
+LOOP_SLOW_CALLBACK_MS = float(os.getenv('LOOP_SLOW_CALLBACK_MS', 100))
+LOOP_DEBUG = os.getenv('LOOP_DEBUG', 'false').lower() in ('1', 'true', 'yes')  # asyncio debug mode, adds overhead
@@ -1,20 +1,72 @@
 import uuid
-from datetime import datetime, timedelta
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
-from sqlalchemy.sql import func
-
-from config import DATABASE_URL, DATABASE_ECHO
+from sqlalchemy import event, literal_column, make_url, select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import (
+    DATABASE_URL,
+    DATABASE_ECHO,
+    DATABASE_POOL_SIZE,
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_POOL_PRE_PING,
+    DATABASE_STATEMENT_CACHE_SIZE,
+)
 from intervals import respawn_intervals
-from database.models import Base, Timer, BossRespawn, User
+from database.models import Base, Timer, BossRespawn, User, Board
+from database.storage import BaseStorage
+from metrics.registry import DB_LATENCY, DB_POOL_EVENTS, timed
 from utils.logger import database_logger
-
-
-class DataBaseAPI():
-    def __init__(self):
-        self.engine = create_async_engine(DATABASE_URL, echo=DATABASE_ECHO, future=True)
+from utils.epoch_time import now_epoch, to_epoch, from_epoch, next_respawn_epoch
+
+UPSERT_TIMER_COLUMNS = (
+    "timer_id", 
+    "respawn_time", 
+    "anchor_time", 
+    "interval_seconds", 
+    "is_new_epoch",
+)
+
+
+def engine_options(url: str) -> dict:
+    options = {
+        "echo": DATABASE_ECHO,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+    }
+    # In-memory SQLite runs on a single shared connection, it has no pool to size
+    if make_url(url).database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+        )
+    if make_url(url).get_driver_name() == "asyncpg":
+        # Both asyncpg's own cache and SQLAlchemy's prepared statement cache
+        # are per connection; 0 turns them off for pgbouncer in transaction mode
+        options["connect_args"] = {
+            "statement_cache_size": DATABASE_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DATABASE_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+class DataBaseAPI(BaseStorage):
+    # Dialect specific INSERT with on_conflict_* support
+    insert = staticmethod(pg_insert)
+
+    def __init__(self, url: str = DATABASE_URL):
+        super().__init__()
+        self.engine = create_async_engine(url, future=True, **engine_options(url))
+        for pool_event in ("checkout", "connect", "invalidate"):
+            event.listen(
+                self.engine.sync_engine.pool,
+                pool_event,
+                lambda *args, pool_event=pool_event: DB_POOL_EVENTS.inc(event=pool_event),
+            )
 
         self.async_session = sessionmaker(
             bind=self.engine,
@@ -22,6 +74,26 @@ class DataBaseAPI():
             expire_on_commit=False
         )
 
+    @property
+    def backend_name(self) -> str:
+        return self.engine.dialect.name
+
+    async def close(self) -> None:
+        await self.engine.dispose()
+
+    def pool_stats(self) -> dict[str, int]:
+        # Pools without a fixed size (NullPool, StaticPool) have no counters
+        pool = self.engine.pool
+        stats = {}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            counter = getattr(pool, name, None)
+            if counter is not None:
+                stats[name] = counter()
+        if "size" in stats:
+            # checkedout reaching capacity means commands queue on checkout
+            stats["capacity"] = stats["size"] + pool._max_overflow
+        return stats
+
     async def create_tables(self) -> bool:
         async with self.engine.begin() as conn: # Работает напрямую с соединением, а не с сессией, так как не ORM
             try:
@@ -60,6 +132,7 @@ class DataBaseAPI():
                 return False
 
 
+    @timed(DB_LATENCY)
     async def get_boss_respawn(self, user_id, boss_name) -> int:
         async with self.async_session() as session:
             try:
@@ -76,6 +149,7 @@ class DataBaseAPI():
                 return False
                 
 
+    @timed(DB_LATENCY)
     async def get_all_boss_respawns(self, user_id) -> list[BossRespawn]:
         async with self.async_session() as session:
             try:
@@ -91,125 +165,216 @@ class DataBaseAPI():
 
 
 
-    async def add_timer(self, user_id, chat_id, boss_name, respawn_time) -> Timer:
-        async with self.async_session() as session:
-            async with session.begin():
-                try:
-                    result = await session.execute(
-                        select(Timer).filter(
-                            Timer.chat_id == chat_id,
-                            Timer.boss_name == boss_name
-                        )
-                    )
-                    old_timer: Timer = result.scalars().first()
+    def _old_timers_query(self, chat_id, rows: list[dict]):
+        return select(Timer.timer_id, Timer.boss_name).filter(
+            Timer.chat_id == chat_id, 
+            Timer.boss_name.in_([row["boss_name"] for row in rows]),
+        )
 
-                    if old_timer:
-                        database_logger.info(
-                            f"In db there was the timer {old_timer.timer_id} "
-                            f"with same parameters. Deleting old timer..."
-                        )
 
-                        await session.delete(old_timer)
-                        database_logger.success(
-                            f"User {user_id} autodeleted old timer with timer_id: {old_timer.timer_id}"
-                        )
+    def _insert_timers_statement(self, chat_id, rows: list[dict]):
+        stmt = self.insert(Timer).values([
+            {
+                "timer_id": str(uuid.uuid4())[:10],
+                "chat_id": chat_id,
+                "boss_name": row["boss_name"],
+                "respawn_time": row["respawn_time"],
+                "anchor_time": row["respawn_time"],
+                "interval_seconds": row["interval_seconds"],
+                "is_new_epoch": row.get("is_new_epoch", False),
+            }
+            for row in rows
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=[Timer.chat_id, Timer.boss_name],
+            set_={column: stmt.excluded[column] for column in UPSERT_TIMER_COLUMNS},
+        )
 
 
-                except Exception as e:
-                    database_logger.error(
-                        f"Error while deleting timer {old_timer.timer_id} before setting"
-                        f" new one by user {user_id}: {str(e)}"
-                    )
-                    return False
+    async def _upsert_timers(self, session, chat_id, rows: list[dict]) -> list[dict]:
+        # One round-trip: the CTE sees the rows as they were before the upsert.
+        # SQLAlchemy does not correlate subqueries in RETURNING with the DML
+        # table, so the returned row's boss_name is referenced textually
+        old_timers = self._old_timers_query(chat_id, rows).cte("old_timers")
+        result = await session.execute(
+            self._insert_timers_statement(chat_id, rows)
+            .returning(
+                *Timer.__table__.c,
+                select(old_timers.c.timer_id)
+                .filter(old_timers.c.boss_name == literal_column(f"{Timer.__tablename__}.boss_name"))
+                .scalar_subquery()
+                .label("replaced_timer_id"),
+            )
+            .add_cte(old_timers)
+        )
+        return result.mappings().all()
 
-                try:
-                    timer_id = str(uuid.uuid4())[:10]
-                    timer = Timer(
-                        timer_id=timer_id, 
-                        chat_id=chat_id, 
-                        boss_name=boss_name, 
-                        respawn_time=respawn_time
-                    )
-                    session.add(timer)
-                    database_logger.success(f"User {user_id} add timer with timer_id: {timer_id}")
-                    await session.commit()
-                    return timer
-                
-                except Exception as e:
-                    database_logger.error(f"Error while adding timer by user {user_id}: {str(e)}")
-                    return False
-                
-        
-    async def update_timer(self, timer: Timer, new_respawn_time) -> Timer:
+
+    @timed(DB_LATENCY)
+    async def add_timers(self, user_id, chat_id, rows: list[dict]) -> list[tuple[Timer, str | None]]:
         async with self.async_session() as session:
             async with session.begin():
                 try:
-                    timer.respawn_time = new_respawn_time
-                    session.add(timer)
+                    returned_rows = await self._upsert_timers(session, chat_id, rows)
                     await session.commit()
-                    database_logger.success(
-                        f"Automatically updated timer with timer_id: {timer.timer_id}"
-                    )
-                    return timer
                 except Exception as e:
-                    database_logger.error(
-                        f"Error while updating timer {timer.timer_id}: {str(e)}"
-                    )
+                    database_logger.error(f"Error while adding timers by user {user_id}: {str(e)}")
                     return False
 
+        timers = []
+        for row in returned_rows:
+            timer = Timer(**{column.name: row[column.name] for column in Timer.__table__.c})
+            timers.append((timer, row["replaced_timer_id"]))
+            if row["replaced_timer_id"]:
+                self.timer_cache.discard(row["replaced_timer_id"], chat_id)
+            self.timer_cache.add(timer)
+
+        replaced_count = sum(1 for _, replaced_timer_id in timers if replaced_timer_id)
+        database_logger.success(
+            f"User {user_id} add {len(timers)} timers in chat {chat_id}, "
+            f"{replaced_count} of them replaced old timers"
+        )
+        return timers
+
+
+    @timed(DB_LATENCY)
+    async def advance_timers(self, timer_ids: list[str], batch_size: int = 1000) -> bool:
+        if not timer_ids:
+            return True
+
+        now_ts = now_epoch()
+        now = from_epoch(now_ts)
+        advanced = 0
+        try:
+            for start in range(0, len(timer_ids), batch_size):
+                async with self.async_session() as session:
+                    async with session.begin():
+                        result = await session.execute(
+                            select(
+                                Timer.timer_id, 
+                                Timer.chat_id,
+                                Timer.respawn_time,
+                                Timer.anchor_time, 
+                                Timer.interval_seconds,
+                            )
+                            .filter(
+                                Timer.timer_id.in_(timer_ids[start:start + batch_size]),
+                                Timer.is_new_epoch.is_(False), 
+                                Timer.respawn_time <= now,
+                            )
+                        )
+                        stale_timers = result.all()
+                        if not stale_timers:
+                            continue
+
+                        # Strictly after the stored respawn, even within its second
+                        respawn_times = {
+                            (timer_id, chat_id): from_epoch(next_respawn_epoch(
+                                to_epoch(anchor_time), 
+                                interval_seconds, 
+                                max(now_ts, to_epoch(respawn_time) + 1),
+                            ))
+                            for timer_id, chat_id, respawn_time, anchor_time, interval_seconds 
+                            in stale_timers
+                        }
+                        await session.execute(
+                            update(Timer),
+                            [
+                                {"timer_id": timer_id, "respawn_time": respawn_time}
+                                for (timer_id, _), respawn_time in respawn_times.items()
+                            ],
+                        )
+                for (timer_id, chat_id), respawn_time in respawn_times.items():
+                    self.timer_cache.update_respawn(timer_id, respawn_time, chat_id)
+                advanced += len(stale_timers)
+
+            if advanced:
+                database_logger.success(f"Automatically advanced {advanced} timers")
+            return True
+        except Exception as e:
+            database_logger.error(f"Error while advancing timers: {str(e)}")
+            return False
+
+
+    @timed(DB_LATENCY)
+    async def delete_timers(self, timer_ids: list[str]) -> bool:
+        if not timer_ids:
+            return True
+
+        try:
+            async with self.async_session() as session:
+                async with session.begin():
+                    await session.execute(
+                        delete(Timer).where(Timer.timer_id.in_(timer_ids))
+                    )
+        except Exception as e:
+            database_logger.error(f"Error while deleting timers in bulk: {str(e)}")
+            return False
+
+        for timer_id in timer_ids:
+            self.timer_cache.discard(timer_id)
+        database_logger.success(f"Automatically deleted {len(timer_ids)} timers")
+        return True
 
-    async def get_all_chat_timers(self, user_id, chat_id) -> list[Timer]:
+
+    async def stream_timers(self, batch_size: int = 1000):
+        # Ordered by the (chat_id, respawn_time) index, so every chat arrives
+        # as one sorted run and warms the timer cache on the way
         async with self.async_session() as session:
             try:
-                await self._delete_expired_timers(chat_id)
-                result = await session.execute(
+                result = await session.stream_scalars(
                     select(Timer)
-                    .filter(Timer.chat_id == chat_id)
-                    .order_by(
-                        Timer.respawn_time
-                    )
+                    .order_by(Timer.chat_id, Timer.respawn_time)
+                    .execution_options(yield_per=batch_size)
                 )
-                timers = result.scalars().all()
-                database_logger.success(f"User {user_id} got all chat timers")
-                
-                return timers
-            except Exception as e:
-                database_logger.error(
-                    f"Error while getting all chat timers by user {user_id}: {str(e)}"
+                chat_id, chat_timers = None, []
+                async for timer in result:
+                    if timer.chat_id != chat_id:
+                        if chat_id is not None:
+                            self.timer_cache.warm(chat_id, chat_timers)
+                        chat_id, chat_timers = timer.chat_id, []
+                    chat_timers.append(timer)
+                    yield timer
+                if chat_id is not None:
+                    self.timer_cache.warm(chat_id, chat_timers)
+                database_logger.success(
+                    f"Timer cache warmed with {len(self.timer_cache)} timers "
+                    f"of {self.timer_cache.chats} chats"
                 )
-                return False
-            
+            except Exception as e:
+                database_logger.error(f"Error while streaming timers: {str(e)}")
 
+
+    @timed(DB_LATENCY)
     async def get_chat_timers(self, user_id, chat_id, count) -> list[Timer]:
+        timers = self.timer_cache.get(chat_id)
+        if timers is not None:
+            timers = self._upcoming(timers, count)
+            database_logger.success(f"User {user_id} got {len(timers)} chat timers from cache")
+            return timers
+
+        generation = self.timer_cache.generation(chat_id)
         async with self.async_session() as session:
             try:
-                await self._delete_expired_timers(chat_id)
-                total_count_result = await session.execute(
-                    select(func.count())
-                    .select_from(Timer).filter(Timer.chat_id == chat_id)
+                result = await session.execute(
+                    select(Timer)
+                    .filter(Timer.chat_id == chat_id)
+                    .order_by(Timer.respawn_time)
                 )
-                total_count = total_count_result.scalar()
-
-                if count < total_count:
-                    result = await session.execute(
-                        select(Timer)
-                        .filter(Timer.chat_id == chat_id)
-                        .order_by(Timer.respawn_time)
-                        .limit(count)
-                    )
-                    timers = result.scalars().all()
-                else:
-                    timers = await self.get_all_chat_timers(user_id, chat_id)
+                chat_timers = result.scalars().all()
+                # Not cached if a write landed while the SELECT was running
+                self.timer_cache.put(chat_id, chat_timers, generation)
+                database_logger.success(f"User {user_id} got all chat timers")
 
-                database_logger.success(f"User {user_id} got {count} chat nearest timers")
-                return timers
+                return self._upcoming(chat_timers, count)
             except Exception as e:
                 database_logger.error(
-                    f"Error while getting chat nearest timers by user {user_id}: {str(e)}"
+                    f"Error while getting chat timers by user {user_id}: {str(e)}"
                 )
                 return False
 
 
+    @timed(DB_LATENCY)
     async def delete_timer(self, user_id, timer_id) -> bool:
         async with self.async_session() as session:
             async with session.begin():
@@ -230,6 +395,7 @@ class DataBaseAPI():
 
                     await session.delete(timer)
                     await session.commit()
+                    self.timer_cache.discard(timer_id, timer.chat_id)
                     database_logger.success(
                         f"User {user_id} deleted timer with timer_id: {timer_id}"
                     )
@@ -242,6 +408,7 @@ class DataBaseAPI():
                     return False
     
     
+    @timed(DB_LATENCY)
     async def delete_all_timers_in_chat(self, chat_id) -> bool:
         async with self.async_session() as session:
             async with session.begin():
@@ -260,6 +427,7 @@ class DataBaseAPI():
                         await session.delete(timer)
                 
                     await session.commit()
+                    self.timer_cache.clear_chat(chat_id)
                     database_logger.success(f"In chat {chat_id} all timers was deleted")
                     return True
                 except Exception as e:
@@ -269,62 +437,37 @@ class DataBaseAPI():
                     return False
 
 
-    async def _get_timer(self, timer: Timer) -> Timer:
-        async with self.async_session() as session:
-            async with session.begin():
-                try:
-                    result = await session.execute(
-                        select(Timer)
-                        .filter(Timer.timer_id == timer.timer_id)
-                    )
-                    existing_timer = result.scalars().first()
-                    
-                    if not existing_timer:
-                        database_logger.info(f"Timer {timer.timer_id} was deleted")
-                        return False
-                    
-                    database_logger.success(
-                        f"Timer {timer.timer_id} is present in Database"
-                    )
-                    return timer
-                except Exception as e:
-                    database_logger.error(
-                        f"Error while updating timer {timer.timer_id}: {str(e)}"
-                    )
-                    return False
+    @timed(DB_LATENCY)
+    async def delete_expired_timers(self, timer_ids: list[str], batch_size: int = 1000) -> list[str]:
+        # Only one-shot epoch timers expire, recurring ones are advanced instead
+        deleted_ids = []
+        try:
+            for start in range(0, len(timer_ids), batch_size):
+                async with self.async_session() as session:
+                    async with session.begin():
+                        result = await session.execute(
+                            delete(Timer)
+                            .where(
+                                Timer.timer_id.in_(timer_ids[start:start + batch_size]),
+                                Timer.is_new_epoch.is_(True),
+                            )
+                            .returning(Timer.timer_id, Timer.chat_id)
+                        )
+                        batch = result.all()
 
+                for timer_id, chat_id in batch:
+                    deleted_ids.append(timer_id)
+                    self.timer_cache.discard(timer_id, chat_id)
 
-
-    async def _delete_expired_timers(self, chat_id) -> bool:
-        async with self.async_session() as session:
-            try:
-                now = datetime.now() - timedelta(seconds=5)
-
-                result = await session.execute(
-                    select(Timer)
-                    .filter(Timer.respawn_time < now)
-                )
-                expired_timers = result.scalars().all()
-                
-                if not expired_timers:
-                    database_logger.info(f"In chat {chat_id} There is no expired timers in Database")
-
-                for timer in expired_timers:
-                        timer_id = timer.timer_id
-                        await session.delete(timer)
-                        database_logger.info(
-                            f"Expired timer {timer_id} was deleted"
-                        )
-                
-                await session.commit()
-                return True
-            
-            except Exception as e:
-                await session.rollback()
-                database_logger.error(f"Error while deleting expired timers {str(e)}")
-                return False
+            if deleted_ids:
+                database_logger.success(f"{len(deleted_ids)} expired timers were deleted")
+            return deleted_ids
+        except Exception as e:
+            database_logger.error(f"Error while deleting expired timers {str(e)}")
+            return False
 
 
+    @timed(DB_LATENCY)
     async def add_userinfo(self, user_id, user_nickname, user_firstname) -> User:
         async with self.async_session() as session:
             async with session.begin():
@@ -353,6 +496,31 @@ class DataBaseAPI():
                     return False
 
 
+    @timed(DB_LATENCY)
+    async def add_userinfos(self, users: list[dict]) -> int:
+        if not users:
+            return 0
+
+        async with self.async_session() as session:
+            async with session.begin():
+                try:
+                    result = await session.execute(
+                        self.insert(User)
+                        .values(users)
+                        .on_conflict_do_nothing(index_elements=[User.user_id])
+                        .returning(User.user_id)
+                    )
+                    added = len(result.scalars().all())
+                    database_logger.success(
+                        f"{added} of {len(users)} users were added to Database"
+                    )
+                    return added
+                except Exception as e:
+                    database_logger.error(f"Error while adding {len(users)} users: {str(e)}")
+                    return False
+
+
+    @timed(DB_LATENCY)
     async def get_userinfo(self, user_id) -> User:
         async with self.async_session() as session:
             try:
@@ -371,3 +539,57 @@ class DataBaseAPI():
             except Exception as e:
                 database_logger.error(f"Error while getting userinfo: {str(e)}")
                 return False
+
+
+    @timed(DB_LATENCY)
+    async def set_board(self, chat_id, message_id) -> bool:
+        async with self.async_session() as session:
+            async with session.begin():
+                try:
+                    await session.execute(
+                        self.insert(Board)
+                        .values(chat_id=chat_id, message_id=message_id)
+                        .on_conflict_do_update(
+                            index_elements=[Board.chat_id],
+                            set_={"message_id": message_id},
+                        )
+                    )
+                    database_logger.success(f"In chat {chat_id} board {message_id} was saved")
+                    return True
+                except Exception as e:
+                    database_logger.error(f"Error while saving board of chat {chat_id}: {str(e)}")
+                    return False
+
+
+    @timed(DB_LATENCY)
+    async def delete_board(self, chat_id) -> int:
+        async with self.async_session() as session:
+            async with session.begin():
+                try:
+                    result = await session.execute(
+                        delete(Board)
+                        .where(Board.chat_id == chat_id)
+                        .returning(Board.message_id)
+                    )
+                    message_id = result.scalar_one_or_none()
+                    if message_id is None:
+                        database_logger.info(f"In chat {chat_id} there is no board")
+                        return "no_board"
+
+                    database_logger.success(f"In chat {chat_id} board was deleted")
+                    return message_id
+                except Exception as e:
+                    database_logger.error(f"Error while deleting board of chat {chat_id}: {str(e)}")
+                    return False
+
+
+    @timed(DB_LATENCY)
+    async def get_all_boards(self) -> list[Board]:
+        async with self.async_session() as session:
+            try:
+                result = await session.execute(select(Board))
+                database_logger.success("Got all boards")
+                return result.scalars().all()
+            except Exception as e:
+                database_logger.error(f"Error while getting all boards: {str(e)}")
+                return False
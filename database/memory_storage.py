@@ -0,0 +1,255 @@
+import uuid
+
+from database.models import BossRespawn, Board, Timer, User
+from database.storage import BaseStorage
+from intervals import respawn_intervals
+from metrics.registry import DB_LATENCY, timed
+from utils.logger import database_logger
+from utils.epoch_time import now_epoch, to_epoch, from_epoch, next_respawn_epoch
+
+# Process-local storage for tests, benchmarks and throwaway runs: nothing
+# survives a restart. Stored Timer objects are never mutated in place, every
+# change stores a new one, so the timer cache can keep sorting by the old
+# respawn_time when it swaps them
+
+
+def _copy_timer(timer: Timer, **changes) -> Timer:
+    values = {column.name: getattr(timer, column.name) for column in Timer.__table__.c}
+    values.update(changes)
+    return Timer(**values)
+
+
+class MemoryStorage(BaseStorage):
+    backend_name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._bosses: dict[str, BossRespawn] = {}
+        self._timers: dict[str, Timer] = {}
+        self._chats: dict[str, dict[str, str]] = {}     # chat_id -> boss_name -> timer_id
+        self._users: dict[str, User] = {}
+        self._boards: dict[str, Board] = {}
+
+    async def create_tables(self) -> bool:
+        database_logger.success("In-memory storage is ready")
+        return True
+
+    async def initialize_boss_respawns(self) -> bool:
+        if self._bosses:
+            database_logger.info(f"Table '{BossRespawn.__tablename__}' was already filled")
+            return True
+
+        for boss_name, times in respawn_intervals.items():
+            self._bosses[boss_name] = BossRespawn(
+                boss_name=boss_name,
+                time_to_respawn=times[0],
+                epoch_time_to_respawn=times[1],
+            )
+        database_logger.success(f"Table '{BossRespawn.__tablename__}' was updated")
+        return True
+
+    @timed(DB_LATENCY)
+    async def get_boss_respawn(self, user_id, boss_name) -> int:
+        boss = self._bosses.get(boss_name)
+        database_logger.success(f"User {user_id} got boss respawn info")
+        return boss.time_to_respawn if boss else None
+
+    @timed(DB_LATENCY)
+    async def get_all_boss_respawns(self, user_id) -> list[BossRespawn]:
+        database_logger.success(f"User {user_id} got boss_respawns info")
+        return list(self._bosses.values())
+
+    def _store(self, timer: Timer) -> None:
+        self._timers[timer.timer_id] = timer
+        self._chats.setdefault(timer.chat_id, {})[timer.boss_name] = timer.timer_id
+        self.timer_cache.add(timer)
+
+    def _remove(self, timer_id: str) -> Timer | None:
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            return None
+        chat_timers = self._chats[timer.chat_id]
+        del chat_timers[timer.boss_name]
+        if not chat_timers:
+            del self._chats[timer.chat_id]
+        self.timer_cache.discard(timer_id, timer.chat_id)
+        return timer
+
+    @timed(DB_LATENCY)
+    async def add_timers(self, user_id, chat_id, rows: list[dict]) -> list[tuple[Timer, str | None]]:
+        timers = []
+        for row in rows:
+            replaced_timer_id = self._chats.get(chat_id, {}).get(row["boss_name"])
+            if replaced_timer_id:
+                self._remove(replaced_timer_id)
+            timer = Timer(
+                timer_id=str(uuid.uuid4())[:10],
+                chat_id=chat_id,
+                boss_name=row["boss_name"],
+                respawn_time=row["respawn_time"],
+                anchor_time=row["respawn_time"],
+                interval_seconds=row["interval_seconds"],
+                is_new_epoch=row.get("is_new_epoch", False),
+            )
+            self._store(timer)
+            timers.append((timer, replaced_timer_id))
+
+        replaced_count = sum(1 for _, replaced_timer_id in timers if replaced_timer_id)
+        database_logger.success(
+            f"User {user_id} add {len(timers)} timers in chat {chat_id}, "
+            f"{replaced_count} of them replaced old timers"
+        )
+        return timers
+
+    @timed(DB_LATENCY)
+    async def advance_timers(self, timer_ids: list[str], batch_size: int = 1000) -> bool:
+        now_ts = now_epoch()
+        stale_timers = [
+            timer for timer in map(self._timers.get, timer_ids)
+            if timer is not None 
+            and not timer.is_new_epoch 
+            and to_epoch(timer.respawn_time) <= now_ts
+        ]
+        for timer in stale_timers:
+            self._store(_copy_timer(timer, respawn_time=from_epoch(next_respawn_epoch(
+                to_epoch(timer.anchor_time), 
+                timer.interval_seconds, 
+                max(now_ts, to_epoch(timer.respawn_time) + 1),
+            ))))
+        if stale_timers:
+            database_logger.success(f"Automatically advanced {len(stale_timers)} timers")
+        return True
+
+    @timed(DB_LATENCY)
+    async def delete_timers(self, timer_ids: list[str]) -> bool:
+        if not timer_ids:
+            return True
+
+        for timer_id in timer_ids:
+            self._remove(timer_id)
+        database_logger.success(f"Automatically deleted {len(timer_ids)} timers")
+        return True
+
+    async def stream_timers(self, batch_size: int = 1000):
+        for chat_id in sorted(self._chats):
+            chat_timers = sorted(
+                (self._timers[timer_id] for timer_id in self._chats[chat_id].values()),
+                key=lambda timer: timer.respawn_time,
+            )
+            self.timer_cache.warm(chat_id, chat_timers)
+            for timer in chat_timers:
+                yield timer
+        database_logger.success(
+            f"Timer cache warmed with {len(self.timer_cache)} timers "
+            f"of {self.timer_cache.chats} chats"
+        )
+
+    @timed(DB_LATENCY)
+    async def get_chat_timers(self, user_id, chat_id, count) -> list[Timer]:
+        timers = self.timer_cache.get(chat_id)
+        if timers is not None:
+            timers = self._upcoming(timers, count)
+            database_logger.success(f"User {user_id} got {len(timers)} chat timers from cache")
+            return timers
+
+        chat_timers = sorted(
+            (self._timers[timer_id] for timer_id in self._chats.get(chat_id, {}).values()),
+            key=lambda timer: timer.respawn_time,
+        )
+        self.timer_cache.put(chat_id, chat_timers)
+        database_logger.success(f"User {user_id} got all chat timers")
+        return self._upcoming(chat_timers, count)
+
+    @timed(DB_LATENCY)
+    async def delete_timer(self, user_id, timer_id) -> bool:
+        if self._remove(timer_id) is None:
+            database_logger.error(
+                f"User {user_id} tried to "
+                f"delete non-existent timer_id: {timer_id}"
+            )
+            return False
+
+        database_logger.success(f"User {user_id} deleted timer with timer_id: {timer_id}")
+        return True
+
+    @timed(DB_LATENCY)
+    async def delete_all_timers_in_chat(self, chat_id) -> bool:
+        chat_timers = self._chats.pop(chat_id, None)
+        if not chat_timers:
+            database_logger.info(f"In chat {chat_id} there is no timers")
+            return "no_timers"
+
+        for timer_id in chat_timers.values():
+            del self._timers[timer_id]
+        self.timer_cache.clear_chat(chat_id)
+        database_logger.success(f"In chat {chat_id} all timers was deleted")
+        return True
+
+    @timed(DB_LATENCY)
+    async def delete_expired_timers(self, timer_ids: list[str], batch_size: int = 1000) -> list[str]:
+        # Only one-shot epoch timers expire, recurring ones are advanced instead
+        deleted_ids = [
+            timer_id for timer_id in timer_ids
+            if timer_id in self._timers and self._timers[timer_id].is_new_epoch
+        ]
+        for timer_id in deleted_ids:
+            self._remove(timer_id)
+        if deleted_ids:
+            database_logger.success(f"{len(deleted_ids)} expired timers were deleted")
+        return deleted_ids
+
+    @timed(DB_LATENCY)
+    async def add_userinfo(self, user_id, user_nickname, user_firstname) -> User:
+        old_user = self._users.get(user_id)
+        if old_user:
+            database_logger.info(f"User {user_id} is already in Database")
+            return old_user
+
+        user = User(user_id=user_id, user_nickname=user_nickname, user_firstname=user_firstname)
+        self._users[user_id] = user
+        database_logger.success(f"User {user_id} was added to Database")
+        return user
+
+    @timed(DB_LATENCY)
+    async def add_userinfos(self, users: list[dict]) -> int:
+        if not users:
+            return 0
+
+        added = 0
+        for user in users:
+            if user["user_id"] not in self._users:
+                self._users[user["user_id"]] = User(**user)
+                added += 1
+        database_logger.success(f"{added} of {len(users)} users were added to Database")
+        return added
+
+    @timed(DB_LATENCY)
+    async def get_userinfo(self, user_id) -> tuple[str, str]:
+        user = self._users.get(user_id)
+        if user:
+            database_logger.success(f"User {user_id} was retrieved from Database")
+            return user.user_nickname, user.user_firstname
+
+        database_logger.error(f"There is no user {user_id} in Database")
+        return False
+
+    @timed(DB_LATENCY)
+    async def set_board(self, chat_id, message_id) -> bool:
+        self._boards[chat_id] = Board(chat_id=chat_id, message_id=message_id)
+        database_logger.success(f"In chat {chat_id} board {message_id} was saved")
+        return True
+
+    @timed(DB_LATENCY)
+    async def delete_board(self, chat_id) -> int:
+        board = self._boards.pop(chat_id, None)
+        if board is None:
+            database_logger.info(f"In chat {chat_id} there is no board")
+            return "no_board"
+
+        database_logger.success(f"In chat {chat_id} board was deleted")
+        return board.message_id
+
+    @timed(DB_LATENCY)
+    async def get_all_boards(self) -> list[Board]:
+        database_logger.success("Got all boards")
+        return list(self._boards.values())
@@ -1,10 +1,28 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index, TypeDecorator, UniqueConstraint, false
 
 Base = declarative_base()
 
+
+class UTCDateTime(TypeDecorator):
+    # timestamptz in Postgres. SQLite stores the bare wall time and hands back
+    # naive datetimes, so values go in as UTC and come out tagged as UTC
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
 class BossRespawn(Base):
     __tablename__ = "boss_respawns"
 
@@ -17,11 +35,19 @@ class BossRespawn(Base):
 
 class Timer(Base):
     __tablename__ = "timers"
+    __table_args__ = (
+        UniqueConstraint("chat_id", "boss_name", name="uq_timers_chat_id_boss_name"),
+        Index("ix_timers_chat_id_respawn_time", "chat_id", "respawn_time"),
+        Index("ix_timers_respawn_time", "respawn_time"),
+    )
 
     timer_id: Mapped[str] = mapped_column(primary_key=True, index=True)
-    chat_id: Mapped[str] = mapped_column(index=True)
+    chat_id: Mapped[str]
     boss_name: Mapped[str] = mapped_column(ForeignKey("boss_respawns.boss_name"))
-    respawn_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    respawn_time: Mapped[datetime] = mapped_column(UTCDateTime)
+    anchor_time: Mapped[datetime] = mapped_column(UTCDateTime)
+    interval_seconds: Mapped[int]
+    is_new_epoch: Mapped[bool] = mapped_column(default=False, server_default=false())
 
     boss_respawns = relationship("BossRespawn", back_populates="timers")
 
@@ -31,4 +57,11 @@ class User(Base):
 
     user_id: Mapped[str] = mapped_column(primary_key=True, index=True)
     user_nickname: Mapped[str]
-    user_firstname: Mapped[str]
\ No newline at end of file
+    user_firstname: Mapped[str]
+
+
+class Board(Base):
+    __tablename__ = "boards"
+
+    chat_id: Mapped[str] = mapped_column(primary_key=True)
+    message_id: Mapped[int]
@@ -0,0 +1,43 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database.db_logic import DataBaseAPI
+from database.models import Timer
+
+# journal_mode=WAL lets readers run next to the single writer, synchronous=NORMAL
+# syncs only on checkpoints (a power cut may lose the last commits, never
+# corrupts), busy_timeout makes a second writer wait instead of failing
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _set_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class SQLiteStorage(DataBaseAPI):
+    insert = staticmethod(sqlite_insert)
+
+    def __init__(self, url: str):
+        super().__init__(url)
+        event.listen(self.engine.sync_engine, "connect", _set_pragmas)
+
+    async def _upsert_timers(self, session, chat_id, rows: list[dict]) -> list[dict]:
+        # SQLite's RETURNING cannot correlate a subquery with the returned row,
+        # so the ids being replaced are read right before the upsert
+        result = await session.execute(self._old_timers_query(chat_id, rows))
+        replaced = {boss_name: timer_id for timer_id, boss_name in result.all()}
+        result = await session.execute(
+            self._insert_timers_statement(chat_id, rows).returning(*Timer.__table__.c)
+        )
+        return [
+            {**row, "replaced_timer_id": replaced.get(row["boss_name"])}
+            for row in result.mappings().all()
+        ]
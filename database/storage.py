@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+from sqlalchemy import make_url
+
+from config import TIMER_CACHE_MAX_CHATS
+from database.models import Timer
+from database.timer_cache import TimerCache
+from utils.epoch_time import now_epoch, to_epoch
+
+# Every storage keeps the return conventions of the original Postgres API:
+# False on a storage error, string markers ("no_timers", "no_board") for
+# expected misses, so backend_logic does not care which one it talks to
+
+
+class BaseStorage(ABC):
+    backend_name = "base"
+
+    def __init__(self):
+        self.engine = None
+        self.timer_cache = TimerCache(max_chats=TIMER_CACHE_MAX_CHATS)
+
+    def pool_stats(self) -> dict[str, int]:
+        return {}
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def create_tables(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def initialize_boss_respawns(self) -> bool:
+        ...
+
+    @abstractmethod
+    async def get_boss_respawn(self, user_id, boss_name) -> int:
+        ...
+
+    @abstractmethod
+    async def get_all_boss_respawns(self, user_id) -> list:
+        ...
+
+    # Delegating wrappers are not timed: the inner call already records the
+    # latency, timing both would count one logical call twice
+    async def add_timer(
+            self,
+            user_id,
+            chat_id,
+            boss_name,
+            respawn_time,
+            interval_seconds: int,
+            is_new_epoch: bool = False,
+        ) -> tuple[Timer, str | None]:
+        res = await self.add_timers(
+            user_id,
+            chat_id,
+            [{
+                "boss_name": boss_name,
+                "respawn_time": respawn_time,
+                "interval_seconds": interval_seconds,
+                "is_new_epoch": is_new_epoch,
+            }],
+        )
+        if not res:
+            return False
+        return res[0]
+
+    @abstractmethod
+    async def add_timers(self, user_id, chat_id, rows: list[dict]) -> list[tuple[Timer, str | None]]:
+        # Upsert on (chat_id, boss_name); pairs each timer with the id it replaced
+        ...
+
+    @abstractmethod
+    async def advance_timers(self, timer_ids: list[str], batch_size: int = 1000) -> bool:
+        # Moves the given recurring timers whose respawn_time has passed to
+        # their next respawn. Only timers whose respawn was notified are passed
+        ...
+
+    @abstractmethod
+    async def delete_timers(self, timer_ids: list[str]) -> bool:
+        ...
+
+    @abstractmethod
+    def stream_timers(self, batch_size: int = 1000) -> AsyncIterator[Timer]:
+        # Implemented as an async generator over all timers ordered by
+        # (chat_id, respawn_time)
+        ...
+
+    async def get_all_chat_timers(self, user_id, chat_id) -> list[Timer]:
+        return await self.get_chat_timers(user_id, chat_id, None)
+
+    @abstractmethod
+    async def get_chat_timers(self, user_id, chat_id, count) -> list[Timer]:
+        ...
+
+    @staticmethod
+    def _upcoming(timers: list[Timer], count) -> list[Timer]:
+        # An epoch timer that already respawned keeps its row until the
+        # sweeper's next pass, it is not shown meanwhile
+        now = now_epoch()
+        timers = [
+            timer for timer in timers
+            if not timer.is_new_epoch or to_epoch(timer.respawn_time) > now
+        ]
+        return timers[:count] if count else timers
+
+    @abstractmethod
+    async def delete_timer(self, user_id, timer_id) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_all_timers_in_chat(self, chat_id) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_expired_timers(self, timer_ids: list[str], batch_size: int = 1000) -> list[str]:
+        # Deletes the given one-shot epoch timers, returns the deleted ids
+        ...
+
+    @abstractmethod
+    async def add_userinfo(self, user_id, user_nickname, user_firstname):
+        ...
+
+    @abstractmethod
+    async def add_userinfos(self, users: list[dict]) -> int:
+        ...
+
+    @abstractmethod
+    async def get_userinfo(self, user_id):
+        ...
+
+    @abstractmethod
+    async def set_board(self, chat_id, message_id) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_board(self, chat_id) -> int:
+        ...
+
+    @abstractmethod
+    async def get_all_boards(self) -> list:
+        ...
+
+
+def create_storage(url: str) -> BaseStorage:
+    # memory:// keeps everything in the process, sqlite+aiosqlite:///path.db
+    # suits a single small node, anything else goes to the Postgres API
+    backend = make_url(url).get_backend_name()
+    if backend == "memory":
+        from database.memory_storage import MemoryStorage
+        return MemoryStorage()
+    if backend == "sqlite":
+        from database.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(url)
+
+    from database.db_logic import DataBaseAPI
+    return DataBaseAPI(url)
@@ -0,0 +1,118 @@
+import bisect
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+
+from database.models import Timer
+
+
+def _sort_key(timer: Timer):
+    return (timer.respawn_time, timer.timer_id)
+
+
+class TimerCache():
+    def __init__(self, max_chats: int = 10000):
+        self.max_chats = max_chats
+        self._chats: OrderedDict[str, list[Timer]] = OrderedDict()
+        self._timers: dict[str, Timer] = {}
+        # A chat's version changes on every mutation, so renders built from
+        # its timers can be reused until it moves
+        self._versions: dict[str, int] = {}
+        self._version_counter = itertools.count(1)
+        # Last write per chat, cached or not: a fill whose SELECT overlapped a
+        # write would store a snapshot without it, so put() drops such fills
+        self._written: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, chat_id: str) -> bool:
+        return chat_id in self._chats
+
+    @property
+    def chats(self) -> int:
+        return len(self._chats)
+
+    def version(self, chat_id: str) -> int | None:
+        return self._versions.get(chat_id)
+
+    def generation(self, chat_id: str) -> int:
+        # Taken before reading a chat from storage, handed back to put()
+        return self._written.get(chat_id, 0)
+
+    def get(self, chat_id: str, count: int | None = None) -> list[Timer] | None:
+        timers = self._chats.get(chat_id)
+        if timers is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._chats.move_to_end(chat_id)
+        return timers[:count] if count else list(timers)
+
+    def put(self, chat_id: str, timers: list[Timer], generation: int | None = None) -> bool:
+        if generation is not None and self.generation(chat_id) != generation:
+            return False
+        self._drop_chat(chat_id)
+        self._chats[chat_id] = sorted(timers, key=_sort_key)
+        self._versions[chat_id] = next(self._version_counter)
+        for timer in timers:
+            self._timers[timer.timer_id] = timer
+        while len(self._chats) > self.max_chats:
+            self._drop_chat(next(iter(self._chats)))
+        return True
+
+    def warm(self, chat_id: str, timers: list[Timer]) -> bool:
+        if len(self._chats) >= self.max_chats:
+            return False
+        self.put(chat_id, timers)
+        return True
+
+    def add(self, timer: Timer) -> None:
+        self._mark_written(timer.chat_id)
+        timers = self._chats.get(timer.chat_id)
+        if timers is None:
+            return
+        self.discard(timer.timer_id)
+        bisect.insort(timers, timer, key=_sort_key)
+        self._timers[timer.timer_id] = timer
+        self._versions[timer.chat_id] = next(self._version_counter)
+
+    def discard(self, timer_id: str, chat_id: str | None = None) -> None:
+        # chat_id is only needed for timers of chats that are not cached
+        timer = self._timers.pop(timer_id, None)
+        if timer is None:
+            if chat_id is not None:
+                self._mark_written(chat_id)
+            return
+        self._mark_written(timer.chat_id)
+        timers = self._chats[timer.chat_id]
+        index = bisect.bisect_left(timers, _sort_key(timer), key=_sort_key)
+        del timers[index]
+        self._versions[timer.chat_id] = next(self._version_counter)
+
+    def update_respawn(self, timer_id: str, respawn_time: datetime, chat_id: str | None = None) -> None:
+        timer = self._timers.get(timer_id)
+        if timer is None:
+            if chat_id is not None:
+                self._mark_written(chat_id)
+            return
+        self.discard(timer_id)
+        timer.respawn_time = respawn_time
+        self.add(timer)
+
+    def clear_chat(self, chat_id: str) -> None:
+        self._mark_written(chat_id)
+        if chat_id in self._chats:
+            self.put(chat_id, [])
+
+    def _mark_written(self, chat_id: str) -> None:
+        self._written[chat_id] = next(self._version_counter)
+
+    def _drop_chat(self, chat_id: str) -> None:
+        timers = self._chats.pop(chat_id, None)
+        self._versions.pop(chat_id, None)
+        for timer in timers or ():
+            self._timers.pop(timer.timer_id, None)
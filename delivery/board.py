@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from telethon.errors import FloodWaitError, MessageIdInvalidError, MessageNotModifiedError
+
+from database.storage import BaseStorage
+from delivery.outbound_queue import OutboundQueue
+from utils.logger import backend_logger
+
+Renderer = Callable[[str], Awaitable[str | None]]
+Editor = Callable[[str, int, str], Awaitable[None]]
+
+
+class BoardUpdater():
+    def __init__(
+            self, 
+            render: Renderer, 
+            edit: Editor, 
+            outbound: OutboundQueue, 
+            db: BaseStorage,
+            interval: float = 60.0,
+        ):
+        self.render = render
+        self.edit = edit
+        self.db = db
+        # Edits take tokens from the same chat and global buckets as messages
+        self.outbound = outbound
+        self.interval = interval
+        self._blocked_until = 0.0
+        self._boards: dict[str, int] = {}        # chat_id -> message_id
+        self._last_text: dict[str, str] = {}
+        self._task: asyncio.Task | None = None
+        self.edits = 0
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._boards)
+
+    def __contains__(self, chat_id: str) -> bool:
+        return chat_id in self._boards
+
+    def add(self, chat_id: str, message_id: int, text: str | None = None) -> None:
+        self._boards[chat_id] = message_id
+        if text is None:
+            self._last_text.pop(chat_id, None)
+        else:
+            self._last_text[chat_id] = text
+
+    def remove(self, chat_id: str) -> int | None:
+        self._last_text.pop(chat_id, None)
+        return self._boards.pop(chat_id, None)
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.interval, self._blocked_until - time.monotonic()))
+            await self.update_all()
+
+    async def update_all(self) -> None:
+        if time.monotonic() < self._blocked_until:
+            return
+
+        for chat_id, message_id in list(self._boards.items()):
+            if self.outbound.is_blocked(chat_id):
+                self.skipped += 1
+                continue
+
+            try:
+                text = await self.render(chat_id)
+            except Exception as e:
+                backend_logger.error(f"Error while rendering board of chat {chat_id}: {str(e)}")
+                continue
+
+            if text is None or text == self._last_text.get(chat_id):
+                self.skipped += 1
+                continue
+
+            await self.outbound.acquire(chat_id)
+            if self._boards.get(chat_id) != message_id:
+                continue    # disabled or replaced while waiting for a token
+            try:
+                await self.edit(chat_id, message_id, text)
+            except MessageNotModifiedError:
+                pass
+            except MessageIdInvalidError:
+                # Forgotten in storage too, or every restart would restore it
+                self.remove(chat_id)
+                if await self.db.delete_board(chat_id) is False:
+                    backend_logger.error(f"Trouble with db when deleting gone board of chat {chat_id}")
+                backend_logger.info(f"Board message of chat {chat_id} is gone, board disabled")
+                continue
+            except FloodWaitError as e:
+                # No board is edited again until the wait is over
+                self._blocked_until = time.monotonic() + e.seconds
+                self.outbound.block(chat_id, e.seconds)
+                backend_logger.info(f"FloodWait for {e.seconds}s, board updates postponed")
+                return
+            except Exception as e:
+                backend_logger.error(f"Error while editing board of chat {chat_id}: {str(e)}")
+                continue
+
+            self._last_text[chat_id] = text
+            self.edits += 1
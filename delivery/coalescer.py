@@ -0,0 +1,90 @@
+import asyncio
+from dataclasses import dataclass, field
+
+from delivery.outbound_queue import OutboundQueue, OutboundMessage, Priority
+
+
+@dataclass(eq=False)
+class PendingBatch:
+    chat_id: str
+    priority: Priority
+    header: str
+    texts: list[str] = field(default_factory=list)
+    lines: list[str] = field(default_factory=list)
+    reply_to: set[int | None] = field(default_factory=set)
+    due_at: float | None = None
+
+
+class NotificationCoalescer():
+    def __init__(self, outbound: OutboundQueue, window: float = 5.0):
+        self.outbound = outbound
+        self.window = window
+        self._pending: dict[tuple[str, Priority, str], PendingBatch] = {}
+        self.received = 0
+        self.flushed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(
+            self, 
+            chat_id: str, 
+            priority: Priority, 
+            text: str, 
+            header: str, 
+            line: str, 
+            reply_to: int | None = None,
+            due_at: float | None = None,
+        ) -> None:
+        # `text` is sent when the notification stays alone in its window,
+        # otherwise `header` is followed by the `line` of every notification
+        self.received += 1
+        if self.window <= 0:
+            self._put(chat_id, priority, text, reply_to, due_at)
+            return
+
+        key = (chat_id, priority, header)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = PendingBatch(chat_id=chat_id, priority=priority, header=header)
+            self._pending[key] = batch
+            asyncio.get_running_loop().call_later(self.window, self._flush, key)
+
+        batch.texts.append(text)
+        batch.lines.append(line)
+        batch.reply_to.add(reply_to)
+        if due_at is not None and (batch.due_at is None or due_at < batch.due_at):
+            batch.due_at = due_at
+
+    def flush_all(self) -> None:
+        for key in list(self._pending):
+            self._flush(key)
+
+    def _flush(self, key: tuple[str, Priority, str]) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+
+        reply_to = next(iter(batch.reply_to)) if len(batch.reply_to) == 1 else None
+        if len(batch.texts) == 1:
+            text = batch.texts[0]
+        else:
+            text = batch.header + "\n" + "\n".join(batch.lines)
+        self._put(batch.chat_id, batch.priority, text, reply_to, batch.due_at)
+
+    def _put(
+            self, 
+            chat_id: str, 
+            priority: Priority, 
+            text: str, 
+            reply_to: int | None, 
+            due_at: float | None = None,
+        ) -> None:
+        self.flushed += 1
+        self.outbound.put(OutboundMessage(
+            chat_id=chat_id, 
+            text=text, 
+            priority=priority, 
+            reply_to=reply_to,
+            due_at=due_at,
+        ))
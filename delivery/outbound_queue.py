@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Awaitable, Callable
+
+from telethon.errors import FloodWaitError
+
+from metrics.registry import NOTIFICATION_LATENESS, OUTBOUND_MESSAGES, OUTBOUND_SEND_LATENCY
+from utils import clock
+from utils.logger import backend_logger
+
+MAX_SEND_ATTEMPTS = 3
+
+
+class Priority(IntEnum):
+    RESPAWN = 0
+    WARNING = 1
+    CONFIRMATION = 2
+
+
+@dataclass(eq=False)
+class OutboundMessage:
+    chat_id: str
+    text: str
+    priority: Priority
+    reply_to: int | None = None
+    due_at: float | None = None      # wall-clock moment the notification was due
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    seq: int = 0
+
+
+class TokenBucket():
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+Sender = Callable[[str, str, int | None], Awaitable[None]]
+
+
+class OutboundQueue():
+    def __init__(
+            self, 
+            send: Sender, 
+            global_rate: float = 25, 
+            chat_rate: float = 20 / 60, 
+            chat_burst: float = 5, 
+            workers: int = 4,
+        ):
+        self.send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._ready: list[tuple[int, int, OutboundMessage]] = []
+        self._delayed: list[tuple[float, int, OutboundMessage]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return len(self._ready) + len(self._delayed)
+
+    def put(self, message: OutboundMessage) -> None:
+        message.seq = next(self._seq)
+        heapq.heappush(self._ready, (message.priority, message.seq, message))
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if any(not task.done() for task in self._tasks):
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def is_blocked(self, chat_id: str) -> bool:
+        bucket = self._chat_buckets.get(chat_id)
+        return bucket is not None and time.monotonic() < bucket.blocked_until
+
+    def block(self, chat_id: str, seconds: float) -> None:
+        self._chat_bucket(chat_id, time.monotonic()).blocked_until = time.monotonic() + seconds
+
+    async def acquire(self, chat_id: str) -> None:
+        # Pacing for requests made outside the queue (board edits): waits
+        # for a token in the chat and global buckets and consumes it
+        while True:
+            now = time.monotonic()
+            chat_bucket = self._chat_bucket(chat_id, now)
+            delay = max(chat_bucket.delay(now), self._global_bucket.delay(now))
+            if delay <= 0:
+                chat_bucket.consume()
+                self._global_bucket.consume()
+                return
+            await asyncio.sleep(delay)
+
+    def _chat_bucket(self, chat_id: str, now: float) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items() 
+                    if not value.is_idle(now)
+                }
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _wait(self, timeout: float | None) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _next_message(self) -> OutboundMessage:
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, message = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (message.priority, message.seq, message))
+
+            if not self._ready:
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                await self._wait(timeout)
+                continue
+
+            _, _, message = heapq.heappop(self._ready)
+            chat_bucket = self._chat_bucket(message.chat_id, now)
+            chat_delay = chat_bucket.delay(now)
+            if chat_delay > 0:
+                heapq.heappush(self._delayed, (now + chat_delay, message.seq, message))
+                continue
+
+            global_delay = self._global_bucket.delay(now)
+            if global_delay > 0:
+                heapq.heappush(self._ready, (message.priority, message.seq, message))
+                await asyncio.sleep(global_delay)
+                continue
+
+            chat_bucket.consume()
+            self._global_bucket.consume()
+            return message
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self._next_message()
+            await self._deliver(message)
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        message.attempts += 1
+        try:
+            await self.send(message.chat_id, message.text, message.reply_to)
+        except FloodWaitError as e:
+            OUTBOUND_MESSAGES.inc(result="flood_wait")
+            self.block(message.chat_id, e.seconds)
+            backend_logger.info(
+                f"FloodWait for {e.seconds}s in chat {message.chat_id}, message postponed"
+            )
+            if message.attempts < MAX_SEND_ATTEMPTS:
+                # Original seq, so it stays ahead of newer messages to the chat
+                heapq.heappush(self._ready, (message.priority, message.seq, message))
+                self._wakeup.set()
+            else:
+                OUTBOUND_MESSAGES.inc(result="failed")
+                backend_logger.error(
+                    f"Message to chat {message.chat_id} dropped after {message.attempts} attempts"
+                )
+        except Exception as e:
+            OUTBOUND_MESSAGES.inc(result="failed")
+            backend_logger.error(f"Error while sending message to chat {message.chat_id}: {str(e)}")
+        else:
+            OUTBOUND_MESSAGES.inc(result="sent")
+            OUTBOUND_SEND_LATENCY.observe(
+                time.monotonic() - message.enqueued_at, 
+                priority=message.priority.name.lower(),
+            )
+            if message.due_at is not None:
+                NOTIFICATION_LATENESS.observe(
+                    max(clock.now() - message.due_at, 0.0), 
+                    priority=message.priority.name.lower(),
+                )
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+from utils import clock
+
+
+# Rendered /get texts keyed by (chat_id, count). An entry is served while the
+# chat's timer version is unchanged and the wall-clock minute is the same,
+# since remaining times are shown as HH:MM, and until `expires_at` if given
+class RenderCache():
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int], tuple[int, int, float | None, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def minute(now: float | None = None) -> int:
+        return int((clock.now() if now is None else now) // 60)
+
+    def get(self, chat_id: str, count: int, version: int | None) -> str | None:
+        key = (chat_id, count)
+        entry = self._entries.get(key)
+        if (
+            entry is None 
+            or version is None 
+            or entry[:2] != (version, self.minute())
+            or (entry[2] is not None and clock.now() >= entry[2])
+        ):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[3]
+
+    def put(
+            self, 
+            chat_id: str, 
+            count: int, 
+            version: int | None, 
+            text: str, 
+            expires_at: float | None = None,
+        ) -> None:
+        if version is None:
+            return
+        key = (chat_id, count)
+        self._entries[key] = (version, self.minute(), expires_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,3 +1,5 @@
+RESPAWN_GRACE = 60  # seconds between a respawn and the next cycle of a recurring timer
+
 respawn_intervals: dict[str, tuple[int, int]] = {
     'Андарас': (15, 14),
     'Базил': (4, 4), 
@@ -15,9 +15,22 @@ from backend_logic import (
     get_chat_timers,
     epochs_timers_start,
     start_chat,
+    start_scheduler,
+    set_board,
 )
 
+from config import LOOP_MONITOR, LOOP_MONITOR_INTERVAL, LOOP_SLOW_CALLBACK_MS, LOOP_DEBUG
+from metrics.loop_monitor import LoopMonitor
 from utils.logger import backend_logger
+from utils.router import (
+    CommandRouter, 
+    any_args, 
+    parse_set_args, 
+    parse_timer_id, 
+    parse_timer_numbers, 
+    parse_board_switch,
+)
+from utils.texts import HELP_TEXT, INFO_TEXT
 from utils.get_client import get_client
 
 
@@ -42,6 +55,116 @@ async def shutdown(signal_name):
     loop.stop()
 
 
+def build_router(bot_username: str | None = None) -> CommandRouter:
+    router = CommandRouter(bot_username=bot_username)
+
+
+    @router.command('bosses', any_args)
+    async def get_bosses_command(event):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+        backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
+        await get_bosses(chat_id=chat_id, user_id=user_id, event=event)
+
+
+    @router.command('set', parse_set_args)
+    async def set_timer_command(event, boss_name, kill_time_str):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+
+        backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
+        await set_timer(
+            chat_id=chat_id, 
+            boss_name=boss_name, 
+            kill_time_str=kill_time_str, 
+            user_id=user_id,
+            event=event,
+        )
+
+    @router.command('all_start', any_args)
+    async def epochs_timers_start_command(event):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+        backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
+        await epochs_timers_start(
+            chat_id=chat_id,
+            user_id=user_id,
+            event=event
+        )
+
+
+    @router.command('delete', parse_timer_id)
+    async def delete_timer_command(event, timer_id):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+
+        backend_logger.info(
+            f"In chat {chat_id} User {user_id} use `{event.message.message}`"
+        )
+
+        await delete_timer(
+            user_id=user_id,
+            chat_id=chat_id,
+            timer_id=timer_id,
+            event=event,
+        )
+
+
+    @router.command('delete_all_timers', any_args)
+    async def delete__all_timers_command(event):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+
+        backend_logger.info(
+            f"In chat {chat_id} User {user_id} use `{event.message.message}`"
+        )
+        await delete_all_timers(chat_id=chat_id, user_id=user_id, event=event)
+
+
+    @router.command('get', parse_timer_numbers)
+    async def get_chat_timers_command(event, timer_numbers):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+
+        backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
+        await get_chat_timers(
+            chat_id=chat_id, 
+            timer_numbers=timer_numbers, 
+            user_id=user_id, 
+            event=event
+        )
+
+
+    @router.command('start')
+    async def start_command(event):
+        chat_id = str(event.chat_id)
+        backend_logger.info(f"In chat {chat_id} User {event.sender_id} used `{event.message.message}`")
+        chat = await event.get_chat()
+        participants = event.client.iter_participants(chat)
+        await start_chat(chat_id=chat_id, chat=chat, participants=participants, event=event)
+
+
+    @router.command('board', parse_board_switch)
+    async def set_board_command(event, enable):
+        chat_id = str(event.chat_id)
+        user_id = str(event.sender_id)
+
+        backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
+        await set_board(chat_id=chat_id, user_id=user_id, enable=enable, event=event)
+
+
+    @router.command('info')
+    async def info_command(event):
+        await event.reply(INFO_TEXT)
+
+
+    @router.command('help')
+    async def help_command(event):
+        await event.reply(HELP_TEXT)
+
+    return router
+
+
 async def main():
     try:
         client = await get_client(as_bot=True)
@@ -55,6 +178,7 @@ async def main():
                 BotCommand(command="delete", description="Удаление таймера по ID"),
                 BotCommand(command="bosses", description="Список всех доступных боссов"),
                 BotCommand(command="all_start", description="Запуск таймеров на всех босов"),
+                BotCommand(command="board", description="Закрепленное табло таймеров"),
                 BotCommand(command="help", description="Описание команд бота"),
                 BotCommand(command="info", description="Информация о боте"),
             ]
@@ -70,153 +194,17 @@ async def main():
         if await set_bot_commands():
             backend_logger.success("Bot commands was successfully setted")
 
+        await start_scheduler(client)
 
-        @client.on(events.NewMessage(pattern=r'/bosses'))
-        async def get_bosses_command(event):
-            chat_id = str(event.chat_id)
-            user_id = str(event.sender_id)
-            backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
-            await get_bosses(chat_id=chat_id, user_id=user_id, event=event)
-
-
-        @client.on(events.NewMessage(pattern=r'/set\s+(.+?)\s*(\d{1,2}:\d{2})?$'))
-        async def set_timer_command(event):
-            chat_id = str(event.chat_id)
-            boss_name = str(event.pattern_match.group(1)).title()
-            kill_time_str = event.pattern_match.group(2)
-            user_id = str(event.sender_id)
-            
-            backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
-            await set_timer(
-                chat_id=chat_id, 
-                boss_name=boss_name, 
-                kill_time_str=kill_time_str, 
-                user_id=user_id,
-                event=event,
-            )
-
-        @client.on(events.NewMessage(pattern='/all_start'))
-        async def epochs_timers_start_command(event):
-            chat_id = str(event.chat_id)
-            user_id = str(event.sender_id)
-            await epochs_timers_start(
-                chat_id=chat_id,
-                user_id=user_id,
-                event=event
-            )
-        
+        me = await client.get_me()
+        router = build_router(bot_username=me.username)
 
-        @client.on(events.NewMessage(pattern=r'^/delete(?!_)\s*([\w-]+)$'))
-        async def delete_timer_command(event):
-            chat_id = str(event.chat_id)
-            user_id = str(event.sender_id)
-
-            try:
-                timer_id = str(event.pattern_match.group(1))
-            except ValueError:
-                await event.reply("❌ Введите целое значение")
-                backend_logger.error(
-                    f"In chat {chat_id} User {user_id} used wrong command "
-                    f"`{event.message.message}`. "
-                    f"Error: not str timer_id"
-                )
-                return
-
-            backend_logger.info(
-                f"In chat {chat_id} User {user_id} use `{event.message.message}`"
-            )
-
-            await delete_timer(
-                user_id=user_id,
-                chat_id=chat_id,
-                timer_id=timer_id,
-                event=event,
-            )
-
-
-        @client.on(events.NewMessage(pattern=r'/delete_all_timers'))
-        async def delete__all_timers_command(event):
-            chat_id = str(event.chat_id)
-            user_id = str(event.sender_id)
-
-            backend_logger.info(
-                f"In chat {chat_id} User {user_id} use `{event.message.message}`"
-            )
-            await delete_all_timers(chat_id=chat_id, user_id=user_id, event=event)
-            
-
-        @client.on(events.NewMessage(pattern=r'^/get(?!_my)(?:@\w+)?(?:\s+(\d+))?$'))
-        async def get_chat_timers_command(event):
-            chat_id = str(event.chat_id)
-            timer_numbers = event.pattern_match.group(1)
-            user_id = str(event.sender_id)
-
-            if timer_numbers is None:
-                timer_numbers = 0
-                
-            try:
-                timer_numbers = int(timer_numbers)
-            except ValueError:
-                await event.reply(
-                    "❌ После `/get` укажи количество ближайших по времени "
-                    "возрождений, которое хочешь видеть"
-                    )
-                backend_logger.error(
-                    f"In chat {chat_id} User {user_id} used wrong command "
-                    f"`{event.message.message}`. "
-                    f"Error: not int timer_numbers"
-                )
-                return
-
-            backend_logger.info(f"In chat {chat_id} User {user_id} used `{event.message.message}`")
-            await get_chat_timers(
-                chat_id=chat_id, 
-                timer_numbers=timer_numbers, 
-                user_id=user_id, 
-                event=event
-            )
-        
-
-        @client.on(events.NewMessage(pattern=r'^/start(@\w+)?$'))
-        async def start_command(event):
-            chat_id = str(event.chat_id)
-            chat = await event.get_chat()
-            participants = await client.get_participants(chat)
-            await start_chat(chat_id=chat_id, chat=chat, participants=participants, event=event)
-
-
-        @client.on(events.NewMessage(pattern=r'^/info(@\w+)?$'))
-        async def info_command(event):
-            await event.reply(
-                "Бот был создан в качестве помощника для игры lineage2m. "
-                "Создатель: @egopbi a.k.a Eeee Gorka"
-            )
-
-
-        @client.on(events.NewMessage(pattern=r'^/help(@\w+)?$'))
-        async def help_command(event):
-            help_text = (
-                "**Доступные команды:**\n\n"
-                "/bosses \n- Выводит список всех боссов с возможностью быстро скопировать имя\n\n"
-                "-------------------------------------\n"
-                "/set <имя_босса> <время_убийства>\n- устанавливает таймер на босса по его имени. "
-                "Формат времени ЧЧ:ММ (если время убийства не указано, "
-                "то учитывается как текущее)\n\n"
-                "-------------------------------------\n"
-                "/get <кол-во выводимых таймеров>\n- выводит "
-                "определенное кол-во активных таймеров в беседе\n\n"
-                "-------------------------------------\n"
-                "/get\n- выводит все активные таймеры в беседе\n\n"
-                "-------------------------------------\n"
-                "/delete <id_таймера>\n- удаляет таймер с определенным ID\n\n"
-                "-------------------------------------\n"
-                "/all_start\n- запускает таймеры на всех боссов\n\n"
-                "-------------------------------------\n"
-                "/info\n- Информация о боте\n\n"
-                "-------------------------------------\n"
-                "/help\n- список команд"
-            )
-            await event.reply(help_text)
+        # One handler for every message: the router drops chatter on the first
+        # character and looks the command up in a table instead of running
+        # each command's regex against it
+        @client.on(events.NewMessage())
+        async def command_dispatcher(event):
+            await router.dispatch(event)
 
         await client.run_until_disconnected()
         backend_logger.success("Bot successfully working")
@@ -241,6 +229,13 @@ async def run_bot():
 
     for s in (signal.SIGTERM, signal.SIGINT):
         loop.add_signal_handler(s, lambda s=s: loop.create_task(shutdown(s.name)))
+
+    if LOOP_MONITOR:
+        LoopMonitor(
+            interval=LOOP_MONITOR_INTERVAL,
+            lag_threshold=LOOP_SLOW_CALLBACK_MS / 1000,
+            debug=LOOP_DEBUG,
+        ).start()
    
     await init_db()
 
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+
+from metrics.registry import LOOP_LAG
+from utils.logger import backend_logger
+
+
+class _AsyncioLogHandler(logging.Handler):
+    # asyncio reports slow callbacks and unretrieved exceptions through the
+    # stdlib `asyncio` logger; forward them into loguru
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level = backend_logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        backend_logger.opt(exception=record.exc_info).log(level, f"asyncio: {record.getMessage()}")
+
+
+class LoopMonitor():
+    def __init__(self, interval: float = 0.5, lag_threshold: float = 0.1, debug: bool = False):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.debug = debug
+        self.max_lag = 0.0
+        self.slow_ticks = 0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        loop = asyncio.get_running_loop()
+        asyncio_logger = logging.getLogger("asyncio")
+        if not any(isinstance(handler, _AsyncioLogHandler) for handler in asyncio_logger.handlers):
+            asyncio_logger.addHandler(_AsyncioLogHandler())
+            asyncio_logger.propagate = False
+        if self.debug:
+            # Debug mode makes asyncio time every callback and log the ones
+            # over the threshold with the task or handle that ran it
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.lag_threshold
+            asyncio_logger.setLevel(logging.WARNING)
+
+        self._task = asyncio.create_task(self.run())
+        backend_logger.info(
+            f"Loop monitor started: interval {self.interval}s, "
+            f"threshold {self.lag_threshold * 1000:.0f}ms, debug {self.debug}"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - expected, 0.0)
+            LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.lag_threshold:
+                self.slow_ticks += 1
+                backend_logger.warning(
+                    f"Event loop lagged {lag * 1000:.0f}ms behind a {self.interval}s tick"
+                )
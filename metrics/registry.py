@@ -0,0 +1,248 @@
+import bisect
+import functools
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable
+
+# A small Prometheus text-format registry. Metrics are updated on the event
+# loop thread only, so plain dicts and floats are enough
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENESS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+        self._callback: Callable[[], dict[tuple, float] | float] | None = None
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, callback: Callable[[], dict[tuple, float] | float]) -> None:
+        # Evaluated on scrape; returns a value, or {label values: value}
+        self._callback = callback
+
+    def samples(self) -> list[str]:
+        values = self._values
+        if self._callback is not None:
+            result = self._callback()
+            values = result if isinstance(result, dict) else {(): result}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values.items()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple, list] = {}    # key -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer():
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry():
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+COMMAND_LATENCY = REGISTRY.register(Histogram(
+    "bot_command_duration_seconds",
+    "Time spent handling a bot command",
+    ("command",),
+))
+DB_LATENCY = REGISTRY.register(Histogram(
+    "bot_db_method_duration_seconds",
+    "Time spent in a storage method",
+    ("method",),
+))
+SCHEDULED_TIMERS = REGISTRY.register(Gauge(
+    "bot_scheduled_timers",
+    "Timers armed in the scheduler",
+))
+DB_POOL = REGISTRY.register(Gauge(
+    "bot_db_pool_connections",
+    "Database pool connections by state",
+    ("state",),
+))
+DB_POOL_EVENTS = REGISTRY.register(Counter(
+    "bot_db_pool_events_total",
+    "Database pool events: checkouts, new connections, invalidations",
+    ("event",),
+))
+OUTBOUND_DEPTH = REGISTRY.register(Gauge(
+    "bot_outbound_queue_depth",
+    "Messages waiting in the outbound queue",
+))
+STAGE_LATENESS = REGISTRY.register(Histogram(
+    "bot_timer_stage_lateness_seconds",
+    "Delay between a timer stage's due time and the scheduler firing it",
+    ("stage",),
+    LATENESS_BUCKETS,
+))
+LOOP_LAG = REGISTRY.register(Histogram(
+    "bot_event_loop_lag_seconds",
+    "How late the loop monitor's periodic tick woke up",
+    (),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+))
+OUTBOUND_SEND_LATENCY = REGISTRY.register(Histogram(
+    "bot_outbound_send_latency_seconds",
+    "Time from enqueueing an outbound message to Telegram accepting it",
+    ("priority",),
+    LATENESS_BUCKETS,
+))
+OUTBOUND_MESSAGES = REGISTRY.register(Counter(
+    "bot_outbound_messages_total",
+    "Outbound send attempts by result: sent, failed, flood_wait",
+    ("result",),
+))
+LOG_LINES_DROPPED = REGISTRY.register(Counter(
+    "bot_log_lines_dropped_total",
+    "Log lines dropped because the background writer's queue was full",
+))
+LOG_WRITE_ERRORS = REGISTRY.register(Counter(
+    "bot_log_write_errors_total",
+    "I/O errors in the background log writer: write, flush or rotation",
+))
+NOTIFICATION_LATENESS = REGISTRY.register(Histogram(
+    "bot_notification_lateness_seconds",
+    "Delay between a notification's due time and its delivery to Telegram",
+    ("priority",),
+    LATENESS_BUCKETS,
+))
+
+
+def timed(histogram: Histogram, **labels):
+    # Decorator for coroutine functions; the method name is the default label
+    def decorator(func):
+        label_values = labels or {histogram.labelnames[0]: func.__name__}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **label_values)
+        return wrapper
+    return decorator
@@ -0,0 +1,212 @@
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Awaitable, Callable
+
+from intervals import RESPAWN_GRACE
+from metrics.registry import STAGE_LATENESS
+from utils import clock
+from utils.logger import backend_logger
+
+WARNING_OFFSET = 180   # "3 minutes left" notification, seconds before respawn
+
+
+class Stage(Enum):
+    WARNING = "warning"
+    RESPAWN = "respawn"
+    REARM = "rearm"
+
+
+@dataclass(eq=False)
+class TimerEntry:
+    timer_id: str
+    chat_id: str
+    boss_name: str
+    user_id: str | None
+    respawn_time: datetime
+    interval: timedelta
+    is_new_epoch: bool = False
+    reply_to: int | None = None
+    stage: Stage = Stage.WARNING
+    fire_at: float = 0.0
+    cancelled: bool = False
+    bucket: set | None = field(default=None, repr=False)
+
+
+StageHandler = Callable[[TimerEntry], Awaitable[bool]]
+
+
+class BaseScheduler(ABC):
+    def __init__(self, handler: StageHandler):
+        self.handler = handler
+        self._entries: dict[str, TimerEntry] = {}
+        self._by_chat: dict[str, dict[str, str]] = {}   # chat_id -> boss_name -> timer_id
+        self._inflight: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, timer_id: str) -> bool:
+        return timer_id in self._entries
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, entry: TimerEntry) -> None:
+        # Mirrors the unique (chat_id, boss_name) constraint of the timers table
+        self.cancel(entry.timer_id)
+        self.cancel_boss(entry.chat_id, entry.boss_name)
+        entry.cancelled = False
+        self._set_first_stage(entry, clock.now())
+        self._entries[entry.timer_id] = entry
+        self._by_chat.setdefault(entry.chat_id, {})[entry.boss_name] = entry.timer_id
+        self._push(entry)
+
+    def schedule_many(self, entries: list[TimerEntry]) -> None:
+        for entry in entries:
+            self.schedule(entry)
+
+    def cancel(self, timer_id: str) -> bool:
+        entry = self._entries.pop(timer_id, None)
+        if entry is None:
+            return False
+        entry.cancelled = True
+        self._unregister(entry)
+        self._remove(entry)
+        return True
+
+    def cancel_boss(self, chat_id: str, boss_name: str) -> bool:
+        timer_id = self._by_chat.get(chat_id, {}).get(boss_name)
+        if timer_id is None:
+            return False
+        return self.cancel(timer_id)
+
+    def cancel_chat(self, chat_id: str) -> int:
+        timer_ids = list(self._by_chat.get(chat_id, {}).values())
+        for timer_id in timer_ids:
+            self.cancel(timer_id)
+        return len(timer_ids)
+
+    def _unregister(self, entry: TimerEntry) -> None:
+        chat_timers = self._by_chat.get(entry.chat_id)
+        if chat_timers is None or chat_timers.get(entry.boss_name) != entry.timer_id:
+            return
+        del chat_timers[entry.boss_name]
+        if not chat_timers:
+            del self._by_chat[entry.chat_id]
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self.run())
+        backend_logger.success(
+            f"{type(self).__name__} started with {len(self)} scheduled timers"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def next_deadline(self) -> float | None:
+        return self._next_deadline()
+
+    async def run_due(self, now: float) -> int:
+        # Fires everything due at `now` one by one, in due order; lets a
+        # simulation drive the scheduler deterministically without run()
+        due = self._pop_due(now)
+        for entry in due:
+            await self._fire(entry)
+        return len(due)
+
+    @abstractmethod
+    async def run(self) -> None:
+        ...
+
+    @abstractmethod
+    def _pop_due(self, now: float) -> list[TimerEntry]:
+        ...
+
+    @abstractmethod
+    def _next_deadline(self) -> float | None:
+        ...
+
+    @abstractmethod
+    def _push(self, entry: TimerEntry) -> None:
+        ...
+
+    @abstractmethod
+    def _remove(self, entry: TimerEntry) -> None:
+        ...
+
+    def _set_first_stage(self, entry: TimerEntry, now: float) -> None:
+        respawn_ts = entry.respawn_time.timestamp()
+        if entry.is_new_epoch or respawn_ts - WARNING_OFFSET > now:
+            entry.stage = Stage.WARNING
+            entry.fire_at = respawn_ts - WARNING_OFFSET
+        else:
+            entry.stage = Stage.RESPAWN
+            entry.fire_at = respawn_ts
+
+    def _set_next_stage(self, entry: TimerEntry) -> bool:
+        respawn_ts = entry.respawn_time.timestamp()
+        if entry.stage is Stage.WARNING:
+            entry.stage = Stage.RESPAWN
+            entry.fire_at = respawn_ts
+        elif entry.stage is Stage.RESPAWN:
+            if entry.is_new_epoch:
+                return False
+            entry.stage = Stage.REARM
+            entry.fire_at = respawn_ts + RESPAWN_GRACE
+        else:
+            if entry.interval.total_seconds() > WARNING_OFFSET:
+                entry.stage = Stage.WARNING
+                entry.fire_at = respawn_ts - WARNING_OFFSET
+            else:
+                entry.stage = Stage.RESPAWN
+                entry.fire_at = respawn_ts
+        return True
+
+    def _dispatch(self, due: list[TimerEntry]) -> None:
+        if not due:
+            return
+        task = asyncio.create_task(self._fire_all(due))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _fire_all(self, due: list[TimerEntry]) -> None:
+        await asyncio.gather(*(self._fire(entry) for entry in due))
+
+    async def _fire(self, entry: TimerEntry) -> None:
+        if entry.cancelled:
+            return
+
+        STAGE_LATENESS.observe(max(clock.now() - entry.fire_at, 0.0), stage=entry.stage.value)
+        if entry.stage is Stage.REARM:
+            entry.respawn_time += entry.interval + timedelta(seconds=RESPAWN_GRACE)
+
+        try:
+            keep = await self.handler(entry)
+        except Exception as e:
+            backend_logger.error(
+                f"Error while handling {entry.stage.value} of timer {entry.timer_id}: {str(e)}"
+            )
+            keep = True
+
+        if entry.cancelled:
+            return
+
+        if not keep or not self._set_next_stage(entry):
+            if self._entries.get(entry.timer_id) is entry:
+                del self._entries[entry.timer_id]
+                self._unregister(entry)
+            return
+
+        self._push(entry)
@@ -0,0 +1,56 @@
+import asyncio
+import heapq
+import itertools
+
+from scheduler.base import BaseScheduler, TimerEntry
+from utils import clock
+
+
+class HeapScheduler(BaseScheduler):
+    def __init__(self, handler):
+        super().__init__(handler)
+        self._heap: list[tuple[float, int, TimerEntry]] = []
+        self._seq = itertools.count()
+        self._cancelled = 0
+
+    def _push(self, entry: TimerEntry) -> None:
+        heapq.heappush(self._heap, (entry.fire_at, next(self._seq), entry))
+        if self._heap[0][2] is entry:
+            self._wakeup.set()
+
+    def _remove(self, entry: TimerEntry) -> None:
+        # Lazy deletion: the heap slot is skipped when popped and the heap is
+        # rebuilt once cancelled slots make up half of it.
+        self._cancelled += 1
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [item for item in self._heap if not item[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def _pop_due(self, now: float) -> list[TimerEntry]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, entry = heapq.heappop(self._heap)
+            if entry.cancelled:
+                self._cancelled = max(0, self._cancelled - 1)
+                continue
+            due.append(entry)
+        return due
+
+    def _next_deadline(self) -> float | None:
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled = max(0, self._cancelled - 1)
+        return self._heap[0][0] if self._heap else None
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            self._dispatch(self._pop_due(clock.now()))
+
+            deadline = self._next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - clock.now())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
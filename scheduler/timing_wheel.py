@@ -0,0 +1,96 @@
+import asyncio
+import math
+
+from scheduler.base import BaseScheduler, TimerEntry
+from utils import clock
+
+# Slots per level: minutes of an hour, hours of a day, days. Every level
+# covers the whole span of the level below it.
+WHEEL_LEVELS = (60, 24, 64)
+
+
+class TimingWheelScheduler(BaseScheduler):
+    def __init__(self, handler, resolution: float = 60.0):
+        super().__init__(handler)
+        self.resolution = resolution
+        self._spans = [1]
+        for slots in WHEEL_LEVELS[:-1]:
+            self._spans.append(self._spans[-1] * slots)
+        self._wheels: list[list[set[TimerEntry]]] = [
+            [set() for _ in range(slots)] for slots in WHEEL_LEVELS
+        ]
+        self._overflow: set[TimerEntry] = set()
+        self._ready: set[TimerEntry] = set()
+        self._tick = int(clock.now() // resolution)
+
+    def _push(self, entry: TimerEntry) -> None:
+        due_tick = math.ceil(entry.fire_at / self.resolution)
+        delta = due_tick - self._tick
+
+        if delta <= 0:
+            bucket = self._ready
+            self._wakeup.set()
+        else:
+            for span, slots, wheel in zip(self._spans, WHEEL_LEVELS, self._wheels):
+                if delta < span * slots:
+                    bucket = wheel[(due_tick // span) % slots]
+                    break
+            else:
+                bucket = self._overflow
+
+        bucket.add(entry)
+        entry.bucket = bucket
+
+    def _remove(self, entry: TimerEntry) -> None:
+        if entry.bucket is not None:
+            entry.bucket.discard(entry)
+            entry.bucket = None
+
+    def _cascade(self, bucket: set[TimerEntry]) -> None:
+        entries = list(bucket)
+        bucket.clear()
+        for entry in entries:
+            self._push(entry)
+
+    def _advance(self, tick: int) -> None:
+        self._tick = tick
+        for level in range(len(WHEEL_LEVELS) - 1, 0, -1):
+            span = self._spans[level]
+            if tick % span == 0:
+                self._cascade(self._wheels[level][(tick // span) % WHEEL_LEVELS[level]])
+        if tick % self._spans[-1] == 0 and self._overflow:
+            self._cascade(self._overflow)
+
+        slot = self._wheels[0][tick % WHEEL_LEVELS[0]]
+        self._ready |= slot
+        slot.clear()
+
+    def _pop_due(self, now: float) -> list[TimerEntry]:
+        target = int(now // self.resolution)
+        while self._tick < target:
+            self._advance(self._tick + 1)
+
+        due = list(self._ready)
+        self._ready.clear()
+        for entry in due:
+            entry.bucket = None
+        due.sort(key=lambda entry: entry.fire_at)
+        return due
+
+    def _next_deadline(self) -> float | None:
+        if self._ready:
+            return self._tick * self.resolution
+        if not self._entries:
+            return None
+        return (self._tick + 1) * self.resolution
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            self._dispatch(self._pop_due(clock.now()))
+
+            timeout = (self._tick + 1) * self.resolution - clock.now()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,35 @@
+import time
+
+# Time source for the scheduler, timer expiry and rendering. The bot runs on
+# SystemClock; simulations install a VirtualClock and move it by hand. Only
+# reading the time goes through here: sleeps and pacing (the sweeper, board
+# updates, the outbound queue, coalescing) always run on the real event loop.
+
+
+class SystemClock():
+    def time(self) -> float:
+        return time.time()
+
+
+class VirtualClock():
+    def __init__(self, start: float | None = None):
+        self._now = time.time() if start is None else start
+
+    def time(self) -> float:
+        return self._now
+
+    def set(self, moment: float) -> None:
+        # Virtual time never goes backwards
+        self._now = max(self._now, moment)
+
+
+_clock: SystemClock | VirtualClock = SystemClock()
+
+
+def set_clock(clock: SystemClock | VirtualClock) -> None:
+    global _clock
+    _clock = clock
+
+
+def now() -> float:
+    return _clock.time()
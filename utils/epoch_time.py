@@ -0,0 +1,104 @@
+import bisect
+from datetime import datetime, timezone
+
+import pytz
+
+from intervals import RESPAWN_GRACE
+from utils import clock
+
+# Respawn moments are UTC epoch seconds, datetimes only appear at the DB and
+# scheduler boundary. Wall time is derived from a per-zone offset table built
+# once from pytz, so formatting a line costs a few integer operations
+
+DAY = 86400
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+
+moscow_tz = pytz.timezone("Europe/Moscow")
+
+
+class OffsetTable():
+    __slots__ = ("starts", "offsets", "_last_start", "_last_offset")
+
+    def __init__(self, tz):
+        # _utc_transition_times and _transition_info are pytz internals, checked
+        # against pytz==2025.1 (requirements.txt). If a release drops or reshapes
+        # them, the table degrades to the zone's current fixed offset
+        try:
+            starts = [
+                int((moment - _EPOCH_NAIVE).total_seconds()) for moment in tz._utc_transition_times
+            ]
+            offsets = [
+                int(utcoffset.total_seconds()) for utcoffset, _, _ in tz._transition_info
+            ]
+            if not starts or len(starts) != len(offsets):
+                raise ValueError("inconsistent transition table")
+        except (AttributeError, TypeError, ValueError):
+            starts = [int((datetime.min - _EPOCH_NAIVE).total_seconds())]
+            offsets = [int(datetime.now(tz).utcoffset().total_seconds())]
+        self.starts = starts
+        self.offsets = offsets
+        self._last_start = self.starts[-1]
+        self._last_offset = self.offsets[-1]
+
+    def offset(self, ts: int) -> int:
+        # Moscow has had no transitions since 2014, so this is the usual path
+        if ts >= self._last_start:
+            return self._last_offset
+        return self.offsets[bisect.bisect_right(self.starts, ts) - 1]
+
+
+MOSCOW_OFFSETS = OffsetTable(moscow_tz)
+
+
+def now_epoch() -> int:
+    return int(clock.now())
+
+
+def to_epoch(moment: datetime) -> int:
+    return int(moment.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+def parse_hh_mm(text: str) -> int | None:
+    # Minutes since midnight, or None if the text is not a valid HH:MM
+    hours, sep, minutes = text.partition(":")
+    if not sep or not hours.isdecimal() or not minutes.isdecimal():
+        return None
+    hours, minutes = int(hours), int(minutes)
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def wall_to_epoch(minute_of_day: int, now: int, table: OffsetTable = MOSCOW_OFFSETS) -> int:
+    # The given wall-clock minute on the current local day of `now`
+    offset = table.offset(now)
+    local_midnight = (now + offset) // DAY * DAY
+    return local_midnight + minute_of_day * 60 - offset
+
+
+def wall_hh_mm(ts: int, table: OffsetTable = MOSCOW_OFFSETS) -> str:
+    hours, minutes = divmod((ts + table.offset(ts)) // 60 % 1440, 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def remaining_hh_mm(seconds: int) -> str:
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def next_respawn_epoch(
+        anchor: int,
+        interval_seconds: int,
+        now: int,
+        is_new_epoch: bool = False,
+    ) -> int:
+    if is_new_epoch or anchor >= now:
+        return anchor
+
+    period = interval_seconds + RESPAWN_GRACE
+    cycles = -(-(now - anchor) // period)
+    return anchor + cycles * period
@@ -1,45 +1,192 @@
-from loguru import logger
-import sys
-import os
-
-logger.remove()
-
-os.makedirs("logs", exist_ok=True)
-
-backend_logger = logger.bind(name="BACKEND")
-logger.add(
-    sys.stdout,
-    format="<white>BACKEND</white>"
-           " | <white>{time:YYYY-MM-DD HH:mm:ss}</white>"
-           " | <level>{level: <8}</level>"
-           " - <white><b>{message}</b></white>",
-    filter=lambda record: record["extra"].get("name") == "BACKEND"
-)
-logger.add(
-    "logs/backend.log",
-    format="<white>BACKEND</white>"
-           " | <white>{time:YYYY-MM-DD HH:mm:ss}</white>"
-           " | <level>{level: <8}</level>"
-           " - <white><b>{message}</b></white>",
-    rotation="100 MB",
-    filter=lambda record: record["extra"].get("name") == "BACKEND"
-)
-
-database_logger = logger.bind(name="DATABASE")
-logger.add(
-    sys.stdout,
-    format="<white>DATABASE</white>"
-           " | <white>{time:YYYY-MM-DD HH:mm:ss}</white>"
-           " | <level>{level: <8}</level>"
-           " - <white><b>{message}</b></white>",
-    filter=lambda record: record["extra"].get("name") == "DATABASE"
-)
-logger.add(
-    "logs/database.log",
-    format="<white>DATABASE</white>"
-           " | <white>{time:YYYY-MM-DD HH:mm:ss}</white>"
-           " | <level>{level: <8}</level>"
-           " - <white><b>{message}</b></white>",
-    rotation="100 MB",
-    filter=lambda record: record["extra"].get("name") == "DATABASE"
-)
+from loguru import logger
+from datetime import datetime
+import atexit
+import itertools
+import queue
+import threading
+import sys
+import os
+
+from config import (
+    LOG_DIR, LOG_ENQUEUE, LOG_FORMAT, LOG_LEVELS, LOG_QUEUE_MAX_LINES, LOG_SUCCESS_SAMPLE_EVERY,
+)
+from metrics.registry import LOG_LINES_DROPPED, LOG_WRITE_ERRORS
+
+LOGGER_NAMES = ("BACKEND", "DATABASE")
+LOG_ROTATION_BYTES = 100 * 2**20
+TEXT_FORMAT = (
+    "<white>{extra[name]}</white>"
+    " | <white>{time:YYYY-MM-DD HH:mm:ss}</white>"
+    " | <level>{level: <8}</level>"
+    " - <white><b>{message}</b></white>"
+)
+
+backend_logger = logger.bind(name="BACKEND")
+database_logger = logger.bind(name="DATABASE")
+
+
+class BackgroundWriter():
+    # Formatted lines are handed to a thread through a bounded queue, so the
+    # event loop only pays for an append. loguru's own enqueue pickles every
+    # record through a multiprocessing queue, which costs more than the write.
+    # When the disk stalls the queue fills up and new lines are dropped and
+    # counted instead of growing memory or blocking the loop
+    def __init__(
+            self,
+            path: str | None = None,
+            stream=None,
+            rotation: int = LOG_ROTATION_BYTES,
+            max_lines: int = LOG_QUEUE_MAX_LINES,
+        ):
+        self.path = path
+        self.rotation = rotation
+        self.dropped = 0
+        self.errors = 0
+        self._reported_dropped = 0
+        self._stream = stream if path is None else open(path, "a", encoding="utf-8")
+        self._queue: queue.Queue = queue.Queue(maxsize=max_lines)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            LOG_LINES_DROPPED.inc()
+
+    def stop(self) -> None:
+        # The writer thread survives I/O errors, so it always gets to the marker
+        self._queue.put(None)
+        self._thread.join()
+        if self.path is not None and not self._stream.closed:
+            self._stream.close()
+
+    def _run(self) -> None:
+        while True:
+            lines = [self._queue.get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in lines
+            lines = [line for line in lines if line is not None]
+            # Errors go straight to stderr: logging them would feed this queue
+            try:
+                self._write("".join(lines))
+            except Exception as e:
+                self._error(f"failed, {len(lines)} lines lost: {e!r}")
+            else:
+                try:
+                    if self.path is not None and self._stream.tell() >= self.rotation:
+                        self._rotate()
+                except Exception as e:
+                    self._error(f"rotation failed: {e!r}")
+            dropped = self.dropped
+            if dropped != self._reported_dropped:
+                self._report(f"queue full, {dropped - self._reported_dropped} lines dropped")
+                self._reported_dropped = dropped
+            if stop:
+                return
+
+    def _write(self, text: str) -> None:
+        if self.path is not None and self._stream.closed:
+            # A failed rotation left no open file, try again on every batch
+            self._stream = open(self.path, "a", encoding="utf-8")
+        self._stream.write(text)
+        self._stream.flush()
+
+    def _rotate(self) -> None:
+        self._stream.close()
+        root, ext = os.path.splitext(self.path)
+        try:
+            os.rename(self.path, f"{root}.{datetime.now():%Y-%m-%d_%H-%M-%S_%f}{ext}")
+        finally:
+            self._stream = open(self.path, "a", encoding="utf-8")
+
+    def _error(self, message: str) -> None:
+        self.errors += 1
+        LOG_WRITE_ERRORS.inc()
+        self._report(message)
+
+    def _report(self, message: str) -> None:
+        try:
+            print(
+                f"{datetime.now():%Y-%m-%d %H:%M:%S} | log writer for {self.path or 'stream'} {message}",
+                file=sys.stderr,
+                flush=True,
+            )
+        except Exception:
+            pass
+
+
+_writers: list[BackgroundWriter] = []
+
+
+def _make_filter(name: str, level: str, sample_every: int):
+    min_level = logger.level(level).no
+    success_level = logger.level("SUCCESS").no
+    counter = itertools.count()
+
+    # Runs on the calling thread, so it only does integer comparisons: every
+    # sample_every-th SUCCESS record passes, other levels are not sampled
+    def record_filter(record) -> bool:
+        if record["extra"].get("name") != name or record["level"].no < min_level:
+            return False
+        if sample_every > 1 and record["level"].no == success_level:
+            return next(counter) % sample_every == 0
+        return True
+
+    return record_filter
+
+
+def stop_logging() -> None:
+    logger.remove()
+    while _writers:
+        _writers.pop().stop()
+
+
+def configure_logging(
+        log_dir: str = LOG_DIR,
+        levels: dict[str, str] = LOG_LEVELS,
+        sample_every: int = LOG_SUCCESS_SAMPLE_EVERY,
+        serialize: bool = LOG_FORMAT == 'json',
+        enqueue: bool = LOG_ENQUEUE,
+        console: bool = True,
+    ) -> None:
+    stop_logging()
+    os.makedirs(log_dir, exist_ok=True)
+
+    for name in LOGGER_NAMES:
+        level = levels.get(name, "DEBUG")
+        path = os.path.join(log_dir, f"{name.lower()}.log")
+        # Every sink gets its own filter, so each one samples independently
+        options = lambda: dict(
+            format=TEXT_FORMAT,
+            level=level,
+            filter=_make_filter(name, level, sample_every),
+            serialize=serialize,
+        )
+
+        if not enqueue:
+            if console:
+                logger.add(sys.stdout, **options())
+            logger.add(path, rotation=LOG_ROTATION_BYTES, **options())
+            continue
+
+        writers = [BackgroundWriter(path=path)]
+        if console:
+            writers.append(BackgroundWriter(stream=sys.stdout))
+        for writer in writers:
+            _writers.append(writer)
+            logger.add(
+                writer.write, 
+                colorize=writer.path is None and sys.stdout.isatty(), 
+                **options(),
+            )
+
+
+atexit.register(stop_logging)
+configure_logging()
@@ -0,0 +1,102 @@
+import re
+from typing import Any, Awaitable, Callable
+
+from metrics.registry import COMMAND_LATENCY
+
+Parser = Callable[[str], tuple | None]
+Handler = Callable[..., Awaitable[Any]]
+
+SET_ARGS_PATTERN = re.compile(r'(.+?)\s*(\d{1,2}:\d{2})?')
+TIMER_ID_PATTERN = re.compile(r'[\w-]+')
+
+
+def no_args(args: str) -> tuple | None:
+    return () if not args else None
+
+
+def any_args(args: str) -> tuple | None:
+    return ()
+
+
+def parse_set_args(args: str) -> tuple | None:
+    match = SET_ARGS_PATTERN.fullmatch(args)
+    if match is None:
+        return None
+    return match.group(1).title(), match.group(2)
+
+
+def parse_timer_id(args: str) -> tuple | None:
+    if TIMER_ID_PATTERN.fullmatch(args) is None:
+        return None
+    return (args,)
+
+
+def parse_timer_numbers(args: str) -> tuple | None:
+    if not args:
+        return (0,)
+    if not args.isdecimal():
+        return None
+    return (int(args),)
+
+
+def parse_board_switch(args: str) -> tuple | None:
+    if args not in ('', 'on', 'off'):
+        return None
+    return (args != 'off',)
+
+
+class CommandRouter():
+    def __init__(self, bot_username: str | None = None):
+        self.bot_username = bot_username.lower() if bot_username else None
+        self._commands: dict[str, tuple[Handler, Parser]] = {}
+        self.routed = 0
+        self.dropped = 0
+
+    def __contains__(self, command: str) -> bool:
+        return command in self._commands
+
+    def add(self, command: str, handler: Handler, parser: Parser = no_args) -> None:
+        self._commands[command] = (handler, parser)
+
+    def command(self, command: str, parser: Parser = no_args):
+        def decorator(handler: Handler) -> Handler:
+            self.add(command, handler, parser)
+            return handler
+        return decorator
+
+    def resolve(self, text: str) -> tuple[str, Handler, tuple] | None:
+        # Ordinary chatter is the bulk of traffic, so it leaves on the first check
+        if not text or text[0] != '/':
+            return None
+
+        parts = text[1:].split(None, 1)
+        if not parts or text[1].isspace():
+            return None
+        head = parts[0]
+        args = parts[1] if len(parts) > 1 else ''
+        command, _, mention = head.partition('@')
+        if mention and self.bot_username and mention.lower() != self.bot_username:
+            return None
+
+        command = command.lower()
+        route = self._commands.get(command)
+        if route is None:
+            return None
+
+        handler, parser = route
+        parsed = parser(args.strip())
+        if parsed is None:
+            return None
+        return command, handler, parsed
+
+    async def dispatch(self, event) -> bool:
+        route = self.resolve(event.message.message)
+        if route is None:
+            self.dropped += 1
+            return False
+
+        command, handler, parsed = route
+        self.routed += 1
+        with COMMAND_LATENCY.time(command=command):
+            await handler(event, *parsed)
+        return True
@@ -0,0 +1,43 @@
+from intervals import respawn_intervals
+
+# Static replies are built once at import instead of on every command
+
+BOSSES_TEXT = "\n".join(
+    ["Список всех боссов\n"]
+    + [
+        f"`{boss_name:<20}` | {intervals[0]} hours"
+        for boss_name, intervals in respawn_intervals.items()
+    ]
+)
+
+HELP_TEXT = (
+    "**Доступные команды:**\n\n"
+    "/bosses \n- Выводит список всех боссов с возможностью быстро скопировать имя\n\n"
+    "-------------------------------------\n"
+    "/set <имя_босса> <время_убийства>\n- устанавливает таймер на босса по его имени. "
+    "Формат времени ЧЧ:ММ (если время убийства не указано, "
+    "то учитывается как текущее)\n\n"
+    "-------------------------------------\n"
+    "/get <кол-во выводимых таймеров>\n- выводит "
+    "определенное кол-во активных таймеров в беседе\n\n"
+    "-------------------------------------\n"
+    "/get\n- выводит все активные таймеры в беседе\n\n"
+    "-------------------------------------\n"
+    "/delete <id_таймера>\n- удаляет таймер с определенным ID\n\n"
+    "-------------------------------------\n"
+    "/all_start\n- запускает таймеры на всех боссов\n\n"
+    "-------------------------------------\n"
+    "/board <on|off>\n- включает или отключает закрепленное табло "
+    "таймеров, которое обновляется раз в минуту\n\n"
+    "-------------------------------------\n"
+    "/info\n- Информация о боте\n\n"
+    "-------------------------------------\n"
+    "/help\n- список команд"
+)
+
+INFO_TEXT = (
+    "Бот был создан в качестве помощника для игры lineage2m. "
+    "Создатель: @egopbi a.k.a Eeee Gorka"
+)
+
+NO_TIMERS_TEXT = "В данный момент нет ни одного активного таймера"